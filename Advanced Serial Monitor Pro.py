@@ -1,319 +1,1786 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
 import serial
 import serial.tools.list_ports
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.animation as animation
-import matplotlib.ticker as mticker
 import numpy as np  
 import time
-import ttkbootstrap as tbs
 import os
+import sys
+import argparse
+import mmap
+import struct
+import json
+import csv
+import socket
+import hashlib
+import base64
 from datetime import datetime
 import gc
 import queue
+import threading
 import traceback
+from collections import OrderedDict, deque
+
+# GUI stack, bound on first use so the headless commands never import Tk
+# or matplotlib: load_gui() brings in what the main window needs to paint,
+# load_plotting() the much heavier matplotlib.
+tk = ttk = messagebox = filedialog = tbs = None
+plt = FigureCanvasTkAgg = NavigationToolbar2Tk = None
+_plotting_lock = threading.Lock()
+
+
+def load_gui():
+    global tk, ttk, messagebox, filedialog, tbs
+    if tk is not None:
+        return
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+    import ttkbootstrap as tbs
+
+
+def load_plotting():
+    # Also called from a background thread to warm the import up after the
+    # window is shown; plt is bound last, once everything is configured.
+    global plt, FigureCanvasTkAgg, NavigationToolbar2Tk
+    with _plotting_lock:
+        if plt is not None:
+            return
+        import matplotlib
+        matplotlib.use('TkAgg')
+        import matplotlib.pyplot as pyplot
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        pyplot.rcParams['figure.autolayout'] = False
+        pyplot.rcParams['toolbar'] = 'None'
+        plt = pyplot
+
+
+CHANNELS = ["CH1", "CH2", "CH3"]
+METRIC_KEYS = ['V', 'I', 'R', 'P']
+
+# Telemetry frame sent by the board, 37 bytes:
+#   <: V1 : I1 :: G1 : V2 : I2 :: G2 : V3 : I3 :: G3 :  ..  FLAGS :>
+# V/I/G are big-endian uint16, FLAGS is a single byte at offset 34.
+FRAME_SIZE = 37
+FRAME_START = b'<:'
+FRAME_END = b':>'
+FRAME_DTYPE = np.dtype({
+    'names': ['V1', 'I1', 'G1', 'V2', 'I2', 'G2', 'V3', 'I3', 'G3', 'flags'],
+    'formats': ['>u2'] * 9 + ['u1'],
+    'offsets': [2, 5, 9, 12, 15, 19, 22, 25, 29, 34],
+    'itemsize': FRAME_SIZE
+})
+V_MAX = 30000
+I_MAX = 1000
+R_OPEN_CIRCUIT = 10000
+# A frame with every field zero; encode_frames() fills in the fields.
+FRAME_TEMPLATE = np.frombuffer(b'<:' + b'\0\0:\0\0::\0\0:' * 3 + b'::\0:>', dtype=np.uint8)
+
+
+def find_frames(arr):
+    """Return start offsets of complete frames in a uint8 array and the offset
+    up to which the array can be discarded."""
+    n = len(arr)
+    if n < 2:
+        return np.empty(0, dtype=np.intp), 0
+    starts = np.flatnonzero((arr[:-1] == FRAME_START[0]) & (arr[1:] == FRAME_START[1]))
+    complete = starts[starts + FRAME_SIZE <= n]
+    pending = starts[starts + FRAME_SIZE > n]
+
+    ends = complete + FRAME_SIZE
+    valid = (arr[ends - 2] == FRAME_END[0]) & (arr[ends - 1] == FRAME_END[1])
+    complete = complete[valid]
+
+    # A '<:' pair inside a payload can look like a frame start. In a clean
+    # stream frames never overlap, so only fall back to a greedy scan when
+    # they do.
+    if len(complete) > 1 and np.any(np.diff(complete) < FRAME_SIZE):
+        accepted = []
+        next_free = 0
+        for start in complete.tolist():
+            if start >= next_free:
+                accepted.append(start)
+                next_free = start + FRAME_SIZE
+        complete = np.array(accepted, dtype=np.intp)
+
+    consumed = int(complete[-1]) + FRAME_SIZE if len(complete) else 0
+    pending = pending[pending >= consumed]
+    if len(pending):
+        consumed = int(pending[0])
+    elif arr[-1] == FRAME_START[0]:
+        consumed = max(consumed, n - 1)
+    else:
+        consumed = n
+    return complete, consumed
+
+
+def decode_frames(data):
+    """Decode every complete frame in data in bulk.
+
+    Returns (values, gains, flags, starts, consumed): values is
+    (n, channel, metric) float64 ordered as CHANNELS x METRIC_KEYS, gains is
+    the raw (n, channel) G field, flags is (n,) uint8, starts holds the frame
+    offsets in data and consumed is the number of leading bytes of data that
+    no longer need to be kept.
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    starts, consumed = find_frames(arr)
+    n = len(starts)
+    if n == 0:
+        return (np.empty((0, len(CHANNELS), len(METRIC_KEYS))),
+                np.empty((0, len(CHANNELS)), dtype=np.uint16),
+                np.empty(0, dtype=np.uint8),
+                starts,
+                consumed)
+
+    if starts[-1] - starts[0] == (n - 1) * FRAME_SIZE:
+        records = np.frombuffer(data, dtype=FRAME_DTYPE, count=n, offset=int(starts[0]))
+    else:
+        records = arr[starts[:, None] + np.arange(FRAME_SIZE)].view(FRAME_DTYPE).ravel()
+
+    values = np.empty((n, len(CHANNELS), len(METRIC_KEYS)))
+    gains = np.empty((n, len(CHANNELS)), dtype=np.uint16)
+    for c in range(len(CHANNELS)):
+        values[:, c, 0] = records[f'V{c + 1}']
+        values[:, c, 1] = records[f'I{c + 1}']
+        gains[:, c] = records[f'G{c + 1}']
+
+    voltage = np.minimum(values[:, :, 0], V_MAX, out=values[:, :, 0])
+    current = np.minimum(values[:, :, 1], I_MAX, out=values[:, :, 1])
+    values[:, :, 2] = R_OPEN_CIRCUIT
+    np.divide(voltage, current, out=values[:, :, 2], where=current != 0)
+    np.multiply(voltage, current, out=values[:, :, 3])
+    values[:, :, 3] /= 1000
+    return values, gains, records['flags'].copy(), starts, consumed
+
+
+def encode_frames(v, i, g, flags):
+    """Inverse of decode_frames(): v, i, g are (n, channel) arrays, flags is
+    (n,). Returns an (n, FRAME_SIZE) uint8 array of frames."""
+    out = np.tile(FRAME_TEMPLATE, (len(flags), 1))
+    records = out.view(FRAME_DTYPE)[:, 0]
+    for c in range(len(CHANNELS)):
+        records[f'V{c + 1}'] = np.clip(np.rint(v[:, c]), 0, 65535)
+        records[f'I{c + 1}'] = np.clip(np.rint(i[:, c]), 0, 65535)
+        records[f'G{c + 1}'] = np.clip(np.rint(g[:, c]), 0, 65535)
+    records['flags'] = flags
+    return out
+
+
+class ByteRingBuffer:
+    """Fixed-capacity receive buffer with read and write cursors.
+
+    peek() hands out a memoryview of the unread bytes and consume() only moves
+    the read cursor, so taking frames off the front never copies the backlog.
+    When the write cursor reaches the end, the unread tail (normally less than
+    one frame) is moved to the start. Bytes that do not fit are discarded
+    oldest-first and counted in dropped_bytes.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self.read_pos = 0
+        self.write_pos = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        return self.write_pos - self.read_pos
+
+    def free(self):
+        return self.capacity - len(self)
+
+    def write(self, data):
+        n = len(data)
+        if n >= self.capacity:
+            self.dropped_bytes += len(self) + n - self.capacity
+            data = memoryview(data)[n - self.capacity:]
+            n = self.capacity
+            self.read_pos = self.write_pos = 0
+        elif self.write_pos + n > self.capacity:
+            overflow = len(self) + n - self.capacity
+            if overflow > 0:
+                self.dropped_bytes += overflow
+                self.read_pos += overflow
+            pending = len(self)
+            self._buf[:pending] = bytes(self._view[self.read_pos:self.write_pos])
+            self.read_pos = 0
+            self.write_pos = pending
+        self._view[self.write_pos:self.write_pos + n] = data
+        self.write_pos += n
+
+    def peek(self):
+        return self._view[self.read_pos:self.write_pos]
+
+    def consume(self, n):
+        self.read_pos = min(self.read_pos + n, self.write_pos)
+        if self.read_pos == self.write_pos:
+            self.read_pos = self.write_pos = 0
+
+    def clear(self):
+        self.read_pos = self.write_pos = 0
+
+
+class SampleStore:
+    """Preallocated circular store of decoded samples (time x channel x metric).
+
+    Every sample is written twice, at head and head + capacity, so the most
+    recent window is always one contiguous slice and latest() can return
+    views instead of copies. Memory use is fixed for the whole session.
+    """
+
+    def __init__(self, capacity, sample_shape=(len(CHANNELS), len(METRIC_KEYS))):
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity)
+        self.values = np.zeros((2 * capacity,) + tuple(sample_shape))
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, times, values):
+        n = len(times)
+        if n > self.capacity:
+            times = times[-self.capacity:]
+            values = values[-self.capacity:]
+            n = self.capacity
+        first = min(n, self.capacity - self.head)
+        for offset in (0, self.capacity):
+            start = self.head + offset
+            self.times[start:start + first] = times[:first]
+            self.values[start:start + first] = values[:first]
+            self.times[offset:offset + n - first] = times[first:]
+            self.values[offset:offset + n - first] = values[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def latest(self, n=None):
+        # Returns (times, values) views over the newest n samples, oldest first.
+        n = self.count if n is None else min(n, self.count)
+        end = self.head + self.capacity
+        return self.times[end - n:end], self.values[end - n:end]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def is_complete(self):
+        # True while nothing has been overwritten yet.
+        return self.count < self.capacity
+
+
+class HistoryStore:
+    """Multi-resolution sample history for long sessions.
+
+    Level 0 is a full-rate SampleStore of the most recent samples. Each
+    further tier stores one bucket per `factor` entries of the tier below,
+    holding (min, max, mean) along the last axis, so tier k spans factor**k
+    times more time than level 0 for the same memory. query() picks the
+    finest level that covers a time range within a point budget and returns
+    a min/max envelope, which keeps short spikes visible when zoomed out.
+    """
+
+    MIN, MAX, MEAN = 0, 1, 2
+
+    def __init__(self, recent_capacity=4096, tier_capacity=4096, factor=16, n_tiers=4,
+                 sample_shape=(len(CHANNELS), len(METRIC_KEYS))):
+        self.factor = factor
+        self.sample_shape = tuple(sample_shape)
+        self.levels = [SampleStore(recent_capacity, self.sample_shape)]
+        self.levels += [SampleStore(tier_capacity, self.sample_shape + (3,)) for _ in range(n_tiers)]
+        self.covered_until = [None] * len(self.levels)
+        self.clear()
+
+    def clear(self):
+        for level in self.levels:
+            level.clear()
+        self.covered_until = [None] * len(self.levels)
+        empty = np.empty((0,) + self.sample_shape)
+        # Entries of level k-1 waiting to fill a bucket of tier k:
+        # (first time, last time, min, max, mean).
+        self.pending = [None] + [
+            (np.empty(0), np.empty(0), empty, empty, empty) for _ in self.levels[1:]
+        ]
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def latest_time(self):
+        times, _ = self.levels[0].latest(1)
+        return float(times[0]) if len(times) else None
+
+    def append(self, times, values):
+        if not len(times):
+            return
+        self.levels[0].append(times, values)
+        incoming = (times, times, values, values, values)
+        for k in range(1, len(self.levels)):
+            t_first, t_last, lo, hi, mean = (
+                np.concatenate([p, i]) for p, i in zip(self.pending[k], incoming)
+            )
+            n_full = len(t_first) // self.factor * self.factor
+            self.pending[k] = tuple(a[n_full:] for a in (t_first, t_last, lo, hi, mean))
+            if n_full == 0:
+                break
+
+            groups = n_full // self.factor
+            shape = (groups, self.factor) + self.sample_shape
+            t_first = t_first[:n_full:self.factor]
+            t_last = t_last[self.factor - 1:n_full:self.factor]
+            lo = lo[:n_full].reshape(shape).min(axis=1)
+            hi = hi[:n_full].reshape(shape).max(axis=1)
+            mean = mean[:n_full].reshape(shape).mean(axis=1)
+
+            self.levels[k].append(t_first, np.stack([lo, hi, mean], axis=-1))
+            self.covered_until[k] = t_last[-1]
+            incoming = (t_first, t_last, lo, hi, mean)
+
+    def _envelope(self, k, n=None):
+        times, data = self.levels[k].latest(n)
+        if k == 0:
+            return times, data, data
+        return times, data[..., self.MIN], data[..., self.MAX]
+
+    def query(self, t_start, t_end, max_points):
+        """Return (level, times, lo, hi) for [t_start, t_end].
+
+        lo/hi have shape (n, *sample_shape) and are identical at level 0.
+        Tier data is followed by the newer entries of finer levels that have
+        not been folded into a bucket yet, so the envelope reaches the latest
+        sample.
+        """
+        chosen = None
+        for k, level in enumerate(self.levels):
+            if not len(level):
+                break
+            times, _ = level.latest()
+            covers = level.is_complete() or times[0] <= t_start
+            i0, i1 = np.searchsorted(times, [t_start, t_end])
+            points = (i1 - i0) * (1 if k == 0 else 2)
+            chosen = k
+            if covers and points <= max_points:
+                break
+
+        if chosen is None:
+            empty = np.empty((0,) + self.sample_shape)
+            return 0, np.empty(0), empty, empty
+
+        segments = [self._envelope(chosen)]
+        for k in range(chosen - 1, -1, -1):
+            n_pending = len(self.pending[k + 1][0])
+            if n_pending:
+                segments.append(self._envelope(k, n_pending))
+        if len(segments) > 1:
+            times, lo, hi = (np.concatenate(parts) for parts in zip(*segments))
+        else:
+            times, lo, hi = segments[0]
+
+        i0, i1 = np.searchsorted(times, [t_start, t_end])
+        # Keep one point either side so the line reaches the axis edges.
+        i0, i1 = max(i0 - 1, 0), min(i1 + 1, len(times))
+        return chosen, times[i0:i1], lo[i0:i1], hi[i0:i1]
+
+
+class RunningStats:
+    """Streaming per-channel, per-metric statistics.
+
+    Each batch is reduced with numpy and merged into the running totals
+    (Chan et al.'s parallel form of Welford's update), so the cost per
+    sample is constant and there is no sample history. The integral is
+    the trapezoidal sum over time, bridging from the last sample of the
+    previous batch; for I (mA) and P (mW) over seconds it is charge in mC
+    and energy in mJ.
+    """
+
+    def __init__(self, sample_shape=(len(CHANNELS), len(METRIC_KEYS))):
+        self.sample_shape = tuple(sample_shape)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.min = np.full(self.sample_shape, np.nan)
+        self.max = np.full(self.sample_shape, np.nan)
+        self.mean = np.zeros(self.sample_shape)
+        self.m2 = np.zeros(self.sample_shape)
+        self.integral = np.zeros(self.sample_shape)
+        self.first_time = None
+        self.last_time = None
+        self.last_values = None
+
+    def append(self, times, values):
+        # times: (n,), values: (n, *sample_shape)
+        n = len(times)
+        if not n:
+            return
+        if self.last_time is not None:
+            times = np.concatenate(([self.last_time], times))
+            joined = np.concatenate((self.last_values[None], values))
+        else:
+            self.first_time = float(times[0])
+            joined = values
+        if len(times) > 1:
+            dt = np.diff(times).reshape((-1,) + (1,) * len(self.sample_shape))
+            self.integral += ((joined[1:] + joined[:-1]) * dt).sum(axis=0) / 2
+
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += batch_m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        self.min = np.fmin(self.min, values.min(axis=0))
+        self.max = np.fmax(self.max, values.max(axis=0))
+        self.last_time = float(times[-1])
+        self.last_values = values[-1].copy()
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else np.full(self.sample_shape, np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def rms(self):
+        return np.sqrt(self.variance + self.mean ** 2)
+
+    @property
+    def duration(self):
+        return 0.0 if self.first_time is None else self.last_time - self.first_time
+
+    def charge(self):
+        # ∫I dt per channel, mC
+        return self.integral[:, METRIC_KEYS.index('I')]
+
+    def energy(self):
+        # ∫P dt per channel, mJ
+        return self.integral[:, METRIC_KEYS.index('P')]
+
+
+def envelope_xy(level, times, lo, hi, c, m):
+    """Line data for channel c / metric m of a HistoryStore.query() result.
+    Tier results become a min/max zig-zag with two points per bucket."""
+    if level == 0:
+        return times, lo[:, c, m]
+    y_data = np.empty(2 * len(times))
+    y_data[0::2] = lo[:, c, m]
+    y_data[1::2] = hi[:, c, m]
+    return np.repeat(times, 2), y_data
+
+
+def fit_y_axes(axes, lines):
+    # Fit each y-axis to its line's data; True if any limit moved.
+    changed = False
+    for metric_key, ax in axes.items():
+        if not len(lines[metric_key].get_ydata()):
+            continue
+        before = ax.get_ylim()
+        ax.relim()
+        ax.autoscale(axis='y')
+        changed |= ax.get_ylim() != before
+    return changed
+
+
+def render_window(history, axes, lines, renderer, c, latest, window,
+                  follow=True, headroom=0.2, autoscale=False, queries=None):
+    """One render step of a channel's plot window: scroll every subplot to
+    the live edge if following, set each line to the min/max envelope of
+    its visible span, optionally re-fit the y-axes, and blit. `axes` and
+    `lines` are keyed by metric; pass the same `queries` dict for all
+    windows of a tick so equal spans hit the history once."""
+    queries = {} if queries is None else queries
+    for metric_key, line in lines.items():
+        ax = axes[metric_key]
+        t_start, t_end = ax.get_xlim()
+        if follow and (latest > t_end or latest < t_end - window
+                       or abs((t_end - t_start) - window) > 1e-9):
+            # Scroll in steps so the ticks, and therefore the cached
+            # background, only change when the window jumps ahead.
+            t_end = latest + window * headroom
+            t_start = t_end - window
+            ax.set_xlim(t_start, t_end)
+            renderer.invalidate()
+
+        # Two points per pixel column is enough for a min/max envelope.
+        max_points = 2 * max(int(ax.get_window_extent().width), 100)
+        key = (t_start, t_end, max_points)
+        if key not in queries:
+            queries[key] = history.query(t_start, t_end, max_points)
+        line.set_data(*envelope_xy(*queries[key], c, METRIC_KEYS.index(metric_key)))
+
+    if autoscale and fit_y_axes(axes, lines):
+        renderer.invalidate()
+    renderer.update()
+    return list(lines.values())
+
+
+class BlitRenderer:
+    """Redraws only the data lines of a figure on top of a cached background.
+
+    The lines are marked animated, so a full draw renders axes, ticks and
+    grid without them; the draw_event handler then caches that background.
+    update() restores it and draws just the lines. A full draw happens only
+    after invalidate() (view limits changed) or when matplotlib redraws on
+    its own, e.g. on resize or toolbar zoom/pan.
+    """
+
+    def __init__(self, figure, canvas, lines):
+        self.figure = figure
+        self.canvas = canvas
+        self.lines = list(lines)
+        self.background = None
+        for line in self.lines:
+            line.set_animated(True)
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for line in self.lines:
+            line.axes.draw_artist(line)
+
+    def invalidate(self):
+        self.background = None
+
+    def update(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_lines()
+        self.canvas.blit(self.figure.bbox)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._cid)
+
+
+class FrameRateController:
+    """Adapts the render period to the measured draw cost.
+
+    The period is chosen so drawing takes at most `duty` of each frame,
+    leaving the rest of the Tk loop free for input and data ingestion, and
+    is kept between 1/max_fps and 1/min_fps.
+    """
+
+    def __init__(self, min_fps=5, max_fps=30, duty=0.5, smoothing=0.2):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.duty = duty
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        self.draw_time = None
+        self.draw_time_max = 0.0
+        self.frame_period = None
+        self.last_tick = None
+
+    def set_limits(self, min_fps, max_fps):
+        self.min_fps = max(min_fps, 0.1)
+        self.max_fps = max(max_fps, self.min_fps)
+
+    def _smooth(self, current, sample):
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def record(self, tick_start, draw_time):
+        if self.last_tick is not None:
+            self.frame_period = self._smooth(self.frame_period, tick_start - self.last_tick)
+        self.last_tick = tick_start
+        self.draw_time = self._smooth(self.draw_time, draw_time)
+        self.draw_time_max = max(self.draw_time_max, draw_time)
+
+    def next_delay_ms(self):
+        # Delay until the next tick, measured from the end of this one.
+        draw_time = self.draw_time or 0.0
+        period = min(max(draw_time / self.duty, 1.0 / self.max_fps), 1.0 / self.min_fps)
+        return max(int(round((period - draw_time) * 1000)), 1)
+
+    def stats(self):
+        return {
+            'fps': 1.0 / self.frame_period if self.frame_period else 0.0,
+            'draw_ms': (self.draw_time or 0.0) * 1000,
+            'draw_max_ms': self.draw_time_max * 1000
+        }
+
+
+# Binary log: LOG_MAGIC, a little-endian uint32 header length, a JSON header
+# describing the record layout, then fixed-width LOG_RECORD_DTYPE records.
+LOG_MAGIC = b'ASMLOG01'
+LOG_RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('values', '<f4', (len(CHANNELS), len(METRIC_KEYS))),
+    ('G', '<u2', (len(CHANNELS),)),
+    ('flags', 'u1'),
+    ('setpoint', '<f4', (len(CHANNELS),)),
+    ('mode', 'u1', (len(CHANNELS),))
+])
+LOG_CSV_HEADER = ",".join(
+    ["Timestamp"]
+    + [f"{ch}_{key}" for ch in CHANNELS for key in METRIC_KEYS]
+    + [f"{ch}_G" for ch in CHANNELS]
+    + ["Flags"]
+    + [f"{ch}_SP" for ch in CHANNELS]
+    + [f"{ch}_Mode" for ch in CHANNELS]
+)
+# Set-point mode codes as sent on the wire; 0 = nothing commanded yet.
+SETPOINT_MODES = {'I': 1, 'R': 2, 'P': 3}
+
+
+def log_header(**extra):
+    """Magic, length and JSON header that start a binary log or stream."""
+    header = json.dumps({
+        'version': 1,
+        'dtype': LOG_RECORD_DTYPE.descr,
+        'channels': CHANNELS,
+        'metrics': METRIC_KEYS,
+        **extra
+    }).encode('utf-8')
+    return LOG_MAGIC + len(header).to_bytes(4, 'little') + header
+
+
+def log_records(times, values, gains, flags, setpoints, modes):
+    records = np.empty(len(times), dtype=LOG_RECORD_DTYPE)
+    records['time'] = times
+    records['values'] = values
+    records['G'] = gains
+    records['flags'] = flags
+    records['setpoint'] = setpoints
+    records['mode'] = modes
+    return records
 
 
 class Logger:
-    def __init__(self):
+    def __init__(self, flush_interval=1.0):
         self.log_file = None
         self.is_logging = False
+        self.format = 'csv'
+        self.flush_interval = flush_interval
+        self.bytes_written = 0
+        self._pending = queue.Queue()
+        self._stop_event = threading.Event()
+        self._writer_thread = None
     
-    def start_logging(self, file_path=None):
+    def start_logging(self, file_path=None, fmt=None):
         if file_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             log_dir = "logs"
             os.makedirs(log_dir, exist_ok=True)
-            file_path = os.path.join(log_dir, f"serial_data_{timestamp}.txt")
+            extension = "bin" if fmt == 'binary' else "txt"
+            file_path = os.path.join(log_dir, f"serial_data_{timestamp}.{extension}")
+        if fmt is None:
+            fmt = 'binary' if file_path.lower().endswith('.bin') else 'csv'
         
         try:
-            self.log_file = open(file_path, 'w')
-            self.log_file.write("Timestamp,Channel,Metric,Value\n")
+            if fmt == 'binary':
+                self.log_file = open(file_path, 'wb')
+                self.log_file.write(log_header())
+            else:
+                self.log_file = open(file_path, 'w')
+                self.log_file.write(LOG_CSV_HEADER + "\n")
+            self.format = fmt
+            self.bytes_written = self.log_file.tell()
+            self._pending = queue.Queue()
+            self._stop_event.clear()
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
             self.is_logging = True
             return True, file_path
         except Exception as e:
             return False, str(e)
-    
-    def log_data_point(self, timestamp, channel, metric, value):
-        if self.is_logging and self.log_file:
+
+    def log_batch(self, times, batch):
+        # times: (n,) relative timestamps; batch: a get_data()/feed() batch.
+        # Only queues the batch; formatting and disk I/O happen on the writer
+        # thread. Safe to call from the acquisition thread.
+        if not (self.is_logging and self.log_file):
+            return
+        n = len(times)
+        setpoints = batch.get('setpoint')
+        if setpoints is None:
+            setpoints = np.full((n, len(CHANNELS)), np.nan)
+        modes = batch.get('mode')
+        if modes is None:
+            modes = np.zeros((n, len(CHANNELS)), dtype=np.uint8)
+        self._pending.put((times, batch['values'], batch['G'], batch['flags'], setpoints, modes))
+
+    def _writer_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self):
+        batches = []
+        while True:
             try:
-                self.log_file.write(f"{timestamp},{channel},{metric},{value}\n")
-                self.log_file.flush() 
-            except Exception as e:
-                print(f"Error writing to log: {e}")
+                batches.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        if not batches:
+            return
+        try:
+            times, values, gains, flags, setpoints, modes = (
+                np.concatenate(parts) for parts in zip(*batches)
+            )
+            if self.format == 'binary':
+                block = log_records(times, values, gains, flags, setpoints, modes).tobytes()
+            else:
+                rows = zip(
+                    times.tolist(),
+                    values.reshape(len(values), -1).tolist(),
+                    gains.tolist(),
+                    flags.tolist(),
+                    setpoints.tolist(),
+                    modes.tolist()
+                )
+                block = "".join(
+                    ",".join(map(str, [t] + v + g + [f] + sp + md)) + "\n"
+                    for t, v, g, f, sp, md in rows
+                )
+            self.log_file.write(block)
+            self.log_file.flush()
+            self.bytes_written += len(block)
+        except Exception as e:
+            print(f"Error writing to log: {e}")
     
     def close(self):
+        self.is_logging = False
+        if self._writer_thread is not None:
+            self._stop_event.set()
+            self._writer_thread.join()
+            self._writer_thread = None
         if self.log_file:
             self.log_file.close()
-            self.is_logging = False
+            self.log_file = None
+
+def read_log_header(f):
+    """Read a binary log header from f. Returns (record dtype, data offset)."""
+    magic = f.read(len(LOG_MAGIC))
+    if magic != LOG_MAGIC:
+        raise ValueError("Not a binary serial monitor log")
+    header_len = int.from_bytes(f.read(4), 'little')
+    header = json.loads(f.read(header_len).decode('utf-8'))
+    dtype = np.dtype([tuple(field) for field in header['dtype']])
+    return dtype, len(LOG_MAGIC) + 4 + header_len
+
+
+class LogReplay:
+    """Plays back a binary log through np.memmap.
+
+    Record timestamps are monotonic, so the time index is the memory-mapped
+    'time' column itself and a seek is a binary search touching a handful of
+    pages. Only the records that are actually played are read from disk.
+    next_items() yields batches in the same format as
+    SerialCommunicationHandler.get_data(), plus {'reset': True} after a seek.
+    """
+
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as f:
+            dtype, offset = read_log_header(f)
+        n_records = (os.path.getsize(file_path) - offset) // dtype.itemsize
+        if n_records == 0:
+            raise ValueError("Log contains no records")
+        self.file_path = file_path
+        self.records = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(n_records,))
+        self.times = self.records['time']
+        self.start = float(self.times[0])
+        self.end = float(self.times[-1])
+        self.position = self.start
+        self.speed = 1.0
+        self.playing = True
+        self.preload = 0.0
+        self._seek = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def index_of(self, t):
+        return int(np.searchsorted(self.times, t))
+
+    def read(self, i0, i1):
+        records = self.records[i0:i1]
+        batch = {
+            "time": np.array(records['time'], dtype=np.float64),
+            "values": np.array(records['values'], dtype=np.float64),
+            "G": np.array(records['G']),
+            "flags": np.array(records['flags'])
+        }
+        # Logs written before set-points were recorded lack these fields.
+        if 'setpoint' in records.dtype.names:
+            batch["setpoint"] = np.array(records['setpoint'], dtype=np.float64)
+            batch["mode"] = np.array(records['mode'])
+        return batch
+
+    def seek(self, t):
+        # Applied by the replay thread on its next step.
+        self._seek = min(max(t, self.start), self.end)
+
+    def next_items(self, wall_dt):
+        items = []
+        seek, self._seek = self._seek, None
+        if seek is not None:
+            items.append({'reset': True})
+            i0, i1 = self.index_of(seek - self.preload), self.index_of(seek)
+            if i1 > i0:
+                items.append(self.read(i0, i1))
+            self.position = seek
+
+        if self.playing and self.position <= self.end:
+            new_position = self.position + wall_dt * self.speed
+            i0, i1 = self.index_of(self.position), self.index_of(new_position)
+            self.position = new_position
+            if i1 > i0:
+                items.append(self.read(i0, i1))
+        return items
 
-class SerialCommunicationHandler:
-    def __init__(self, port):
-        self.ser = serial.Serial(port, 115200, timeout=1)
-        self.last_read_time = time.time()
-        self.read_interval = 0.05 
-        self.buffer = bytearray()
-    
-    def send_channel_config(self, channel, method, value):
+    def close(self):
+        self.times = None
+        self.records = None
+
+
+# Raw capture: RAW_MAGIC, then chunks of RAW_CHUNK_HEADER (perf_counter_ns
+# at read time, payload length) followed by the bytes exactly as read. The
+# file grows in preallocated blocks; a zero-length chunk marks the end.
+RAW_MAGIC = b'ASMRAW01'
+RAW_CHUNK_HEADER = struct.Struct('<QI')
+
+
+class RawCapture:
+    def __init__(self, file_path, block_size=4 * 1024 * 1024):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.file = open(file_path, 'wb', buffering=1024 * 1024)
+        self.file.write(RAW_MAGIC)
+        self.size = len(RAW_MAGIC)
+        self.allocated = 0
+        self.chunks = 0
+        self._preallocate(self.size)
+
+    def _preallocate(self, needed):
+        # Grow the file a block at a time so appends do not extend it on
+        # every write.
+        if needed <= self.allocated:
+            return
+        self.allocated = (needed // self.block_size + 1) * self.block_size
+        fallocate = getattr(os, 'posix_fallocate', None)
         try:
-            channel_map = {'CH1': 1, 'CH2': 2, 'CH3': 3}
-            method_map = {'I': 1, 'R': 2, 'P': 3}
+            if fallocate:
+                fallocate(self.file.fileno(), 0, self.allocated)
+            else:
+                self.file.flush()
+                os.truncate(self.file_path, self.allocated)
+        except OSError:
+            pass
 
-            if channel not in channel_map or method not in method_map:
-                messagebox.showinfo(f"[ERROR] Invalid channel or method: {channel}, {method}")
-                return False
+    def write(self, data, timestamp_ns=None):
+        if timestamp_ns is None:
+            timestamp_ns = time.perf_counter_ns()
+        self._preallocate(self.size + RAW_CHUNK_HEADER.size + len(data))
+        self.file.write(RAW_CHUNK_HEADER.pack(timestamp_ns, len(data)))
+        self.file.write(data)
+        self.size += RAW_CHUNK_HEADER.size + len(data)
+        self.chunks += 1
 
-            try:
-                value = float(value)
-            except ValueError:
-                messagebox.showinfo("[ERROR] Value is not a valid float")
-                return False
-
-            int_value = max(0, min(int(value), 65535))
-            high_byte = (int_value >> 8) & 0xFF
-            low_byte = int_value & 0xFF
-            packet = bytearray([
-                ord('<'),
-                ord(':'),
-                channel_map[channel],
-                ord(':'),             
-                method_map[method],  
-                ord(':'),            
-                high_byte,
-                low_byte,
-                ord(':'),
-                ord('>')
-            ])
-
-
-            self.ser.write(packet)
-            return True
+    def close(self):
+        if self.file:
+            self.file.flush()
+            self.file.truncate(self.size)
+            self.file.close()
+            self.file = None
+
+
+def iter_raw_capture(file_path):
+    """Yield (timestamp_ns, bytes) for every chunk of a raw capture."""
+    with open(file_path, 'rb') as f:
+        if f.read(len(RAW_MAGIC)) != RAW_MAGIC:
+            raise ValueError("Not a raw serial capture")
+        if os.path.getsize(file_path) == len(RAW_MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = len(RAW_MAGIC)
+            end = len(mm)
+            while pos + RAW_CHUNK_HEADER.size <= end:
+                timestamp_ns, length = RAW_CHUNK_HEADER.unpack_from(mm, pos)
+                pos += RAW_CHUNK_HEADER.size
+                if length == 0 or pos + length > end:
+                    break
+                yield timestamp_ns, mm[pos:pos + length]
+                pos += length
+
+
+# Fault bits of the frame flags byte, MSB first.
+FLAG_ALARMS = [
+    (0x80, 'OVER_TEMP', "Temperature exceeded 70°C. System shut down; restart manually after cooling."),
+    (0x40, 'CH1_OVER_CURRENT', "Channel 1 current limit exceeded (max 1 A)."),
+    (0x20, 'CH2_OVER_CURRENT', "Channel 2 current limit exceeded (max 1 A)."),
+    (0x10, 'CH3_OVER_CURRENT', "Channel 3 current limit exceeded (max 1 A)."),
+]
+
+
+class AlarmBus:
+    """Turns per-frame flag bytes into alarm events without blocking.
+
+    publish_flags() runs on the acquisition thread and only emits on
+    transitions: a bit that stays set is one alarm, not one per frame. Each
+    key emits at most once per `dedup_interval`, and at most `max_rate`
+    events per second (burst `burst`) get through overall; rate-limited
+    changes are counted in `suppressed`. A change that is held back is not
+    lost: the latest state of the key is emitted once its window has passed
+    and a token is free, so the last event of a key always ends up matching
+    `active`. A flap back to the last emitted state bumps that event's count
+    instead. Consumers drain() events on their own schedule, and the last
+    `history_size` events are kept as a timestamped log.
+    """
+
+    def __init__(self, dedup_interval=1.0, max_rate=5.0, burst=10, history_size=1000, log_path=None):
+        self.dedup_interval = dedup_interval
+        self.max_rate = max_rate
+        self.burst = burst
+        self.log_path = log_path
+        self.active = 0
+        self.suppressed = 0
+        self.history = deque(maxlen=history_size)
+        self._events = deque(maxlen=history_size)
+        self._keys = {}
+        self._tokens = float(burst)
+        self._last_refill = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def publish_flags(self, times, flags):
+        # times: (n,) perf_counter seconds, flags: (n,) uint8
+        if not len(flags):
+            return
+        states = np.concatenate(([self.active], flags)).astype(np.uint8)
+        changed = np.flatnonzero(states[1:] != states[:-1])
+        if not len(changed):
+            return
+        for i in changed:
+            before, after = int(states[i]), int(states[i + 1])
+            for mask, key, message in FLAG_ALARMS:
+                if (before ^ after) & mask:
+                    self.publish(key, message, bool(after & mask), float(times[i]))
+        self.active = int(states[-1])
+
+    def publish(self, key, message, active=True, t=None):
+        t = time.perf_counter() if t is None else t
+        with self._lock:
+            emitted = self._flush(t)
+            state = self._keys.setdefault(key, {'event': None, 'pending': None})
+            last = state['event']
+            if active == (last is not None and last['active']):
+                # Back to the state consumers already have (a key that was
+                # never emitted counts as cleared).
+                state['pending'] = None
+                if last is not None:
+                    last['count'] += 1
+            elif last is not None and t - last['time'] < self.dedup_interval:
+                state['pending'] = (message, active, t)
+            elif self._take_token():
+                emitted.append(self._emit(state, key, message, active, t))
+            else:
+                self.suppressed += 1
+                state['pending'] = (message, active, t)
+        self._write_log(emitted)
+
+    def _flush(self, now):
+        # Emit held-back states whose dedup window has passed, token
+        # permitting. Called with the lock held.
+        emitted = []
+        for key, state in self._keys.items():
+            last = state['event']
+            if state['pending'] is None or (last is not None and now - last['time'] < self.dedup_interval):
+                continue
+            if not self._take_token():
+                break
+            emitted.append(self._emit(state, key, *state['pending']))
+        return emitted
+
+    def _emit(self, state, key, message, active, t):
+        event = {
+            'time': t,
+            'wall': datetime.now(),
+            'key': key,
+            'message': message,
+            'active': active,
+            'count': 1
+        }
+        state['event'] = event
+        state['pending'] = None
+        self._events.append(event)
+        self.history.append(event)
+        return event
+
+    def _take_token(self):
+        now = time.perf_counter()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.max_rate)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _write_log(self, events):
+        if not (self.log_path and events):
+            return
+        try:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    state = "RAISED" if event['active'] else "CLEARED"
+                    f.write(f"{event['wall'].isoformat(timespec='milliseconds')} {state} "
+                            f"{event['key']}: {event['message']}\n")
+        except OSError as e:
+            print(f"Error writing alarm log: {e}")
+
+    def drain(self):
+        with self._lock:
+            emitted = self._flush(time.perf_counter())
+            events = list(self._events)
+            self._events.clear()
+        self._write_log(emitted)
+        return events
+
+
+SIMULATOR_PORT = "simulator"
+
+
+class VirtualDevice:
+    """serial.Serial stand-in that behaves like the board.
+
+    Frames are generated at `rate` per second of wall time, or as fast as
+    they are read with throttle=False, in which case the output depends
+    only on the seed and the virtual clock advances by 1/rate per frame.
+    Each channel holds a voltage and a current; set-point commands written
+    to the device move the current (I directly, R as V/R, P as P*1000/V),
+    and a current above `current_limit` is clamped and raises that
+    channel's over-current flag. `events` are (t, channel, key, value)
+    steps on the virtual clock, with key 'V' or 'I', or 'flags' to force
+    flag bits (channel ignored). Gaussian `noise` is relative to the
+    level; `corrupt_rate` and `partial_rate` are the per-frame
+    probabilities of a garbled byte or a truncated frame. The rate is not
+    limited by a real line rate; `baudrate` reports the 8N1 rate that would
+    carry it, so the reader's per-byte timestamps match the frame rate.
+    """
+
+    CHUNK_FRAMES = 256
+
+    def __init__(self, rate=1000.0, seed=0, noise=0.0, corrupt_rate=0.0, partial_rate=0.0,
+                 events=(), voltage=12000.0, current=100.0, gain=1000, current_limit=I_MAX,
+                 throttle=True, timeout=0.05):
+        self.rate = float(rate)
+        self.rng = np.random.default_rng(seed)
+        self.noise = noise
+        self.corrupt_rate = corrupt_rate
+        self.partial_rate = partial_rate
+        self.events = sorted(events, key=lambda e: e[0])
+        self.current_limit = current_limit
+        self.throttle = throttle
+        self.timeout = timeout
+        self.voltage = np.full(len(CHANNELS), float(voltage))
+        self.current = np.full(len(CHANNELS), float(current))
+        self.gain = np.full(len(CHANNELS), gain)
+        self.flags = 0
+        self.forced_flags = 0
+        self.frames_generated = 0
+        self.commands_received = 0
+        self.is_open = True
+        self._event_index = 0
+        self._output = bytearray()
+        self._input = bytearray()
+        self._start = time.perf_counter()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def baudrate(self):
+        return self.rate * FRAME_SIZE * 10
+
+    def _set_current(self, c, current):
+        mask = 0x40 >> c
+        if current > self.current_limit:
+            current = self.current_limit
+            self.flags |= mask
+        else:
+            self.flags &= ~mask
+        self.current[c] = max(current, 0.0)
+
+    def _apply_event(self, channel, key, value):
+        if key == 'flags':
+            self.forced_flags = int(value) & 0xFF
+            return
+        c = CHANNELS.index(channel) if isinstance(channel, str) else int(channel)
+        if key == 'V':
+            self.voltage[c] = value
+        else:
+            self._set_current(c, value)
+
+    def _frames(self, n):
+        # n frames from the current state, applying events as the virtual
+        # clock passes them.
+        chunks = []
+        while n > 0:
+            k = n
+            if self._event_index < len(self.events):
+                due = int(np.ceil(self.events[self._event_index][0] * self.rate))
+                if due <= self.frames_generated:
+                    _, channel, key, value = self.events[self._event_index]
+                    self._apply_event(channel, key, value)
+                    self._event_index += 1
+                    continue
+                k = min(n, due - self.frames_generated)
+            v = np.tile(self.voltage, (k, 1))
+            i = np.tile(self.current, (k, 1))
+            if self.noise:
+                v *= 1 + self.noise * self.rng.standard_normal(v.shape)
+                i *= 1 + self.noise * self.rng.standard_normal(i.shape)
+            chunks.append(encode_frames(v, i, np.tile(self.gain, (k, 1)),
+                                        np.full(k, self.flags | self.forced_flags, dtype=np.uint8)))
+            self.frames_generated += k
+            n -= k
+        frames = np.concatenate(chunks)
+        if not (self.corrupt_rate or self.partial_rate):
+            return frames.tobytes()
+        keep = np.ones(frames.shape, dtype=bool)
+        corrupt = np.flatnonzero(self.rng.random(len(frames)) < self.corrupt_rate)
+        if len(corrupt):
+            positions = self.rng.integers(0, FRAME_SIZE, len(corrupt))
+            frames[corrupt, positions] = self.rng.integers(0, 256, len(corrupt))
+        partial = np.flatnonzero(self.rng.random(len(frames)) < self.partial_rate)
+        if len(partial):
+            cuts = self.rng.integers(1, FRAME_SIZE, len(partial))
+            keep[partial] = np.arange(FRAME_SIZE) < cuts[:, None]
+        return frames[keep].tobytes()
+
+    def _generate(self, min_bytes=0):
+        if self.throttle:
+            due = int((time.perf_counter() - self._start) * self.rate) - self.frames_generated
+        else:
+            # Unthrottled: always have at least CHUNK_FRAMES ready.
+            wanted = max(min_bytes, self.CHUNK_FRAMES * FRAME_SIZE)
+            due = -(-(wanted - len(self._output)) // FRAME_SIZE)
+        if due > 0:
+            self._output += self._frames(due)
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            self._generate()
+            return len(self._output)
+
+    def read(self, size=1):
+        deadline = time.perf_counter() + (self.timeout or 0)
+        self._cancel.clear()
+        while True:
+            with self._lock:
+                self._generate(size)
+                if self._output or not self.throttle:
+                    data = bytes(self._output[:size])
+                    del self._output[:size]
+                    return data
+            wait = min(deadline - time.perf_counter(), 1.0 / self.rate)
+            if wait <= 0 or self._cancel.wait(wait):
+                return b''
+
+    def write(self, data):
+        # Parses set-point packets: <: channel : method : hi lo :>
+        with self._lock:
+            self._input += data
+            while True:
+                start = self._input.find(FRAME_START)
+                if start < 0 or len(self._input) - start < 10:
+                    break
+                packet = self._input[start:start + 10]
+                del self._input[:start + 10]
+                if packet[8:10] != FRAME_END or not 1 <= packet[2] <= len(CHANNELS):
+                    continue
+                c, method, value = packet[2] - 1, packet[4], packet[6] << 8 | packet[7]
+                self.commands_received += 1
+                if method == SETPOINT_MODES['I']:
+                    self._set_current(c, value)
+                elif method == SETPOINT_MODES['R']:
+                    self._set_current(c, self.voltage[c] / value if value else self.current_limit + 1)
+                elif method == SETPOINT_MODES['P']:
+                    self._set_current(c, value * 1000 / self.voltage[c] if self.voltage[c] else 0.0)
+        return len(data)
+
+    def cancel_read(self):
+        self._cancel.set()
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._output.clear()
 
+    def close(self):
+        self.is_open = False
+        self._cancel.set()
+
+
+def serve_pty(device, stop_event):
+    """Expose a VirtualDevice on a pseudo-terminal (POSIX only) and return
+    its path; a thread moves bytes both ways until stop_event is set."""
+    import pty
+    import tty
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    os.set_blocking(master, False)
+    path = os.ttyname(slave)
+
+    def pump():
+        pending = b''
+        try:
+            while not stop_event.is_set():
+                if not pending:
+                    pending = device.read(65536)
+                if pending:
+                    try:
+                        pending = pending[os.write(master, pending):]
+                    except BlockingIOError:
+                        time.sleep(0.001)
+                try:
+                    device.write(os.read(master, 4096))
+                except BlockingIOError:
+                    pass
+        finally:
+            device.close()
+            os.close(master)
+            os.close(slave)
+
+    threading.Thread(target=pump, daemon=True).start()
+    return path
+
+
+class SerialCommunicationHandler:
+    def __init__(self, port=None, ser=None, baudrate=115200):
+        # port=None without ser gives an offline decoder driven through feed().
+        self.read_interval = 0.05 
+        if ser is None and port == SIMULATOR_PORT:
+            ser = VirtualDevice(noise=0.01, timeout=self.read_interval)
+        elif ser is None and port is not None:
+            ser = serial.Serial(port, baudrate, timeout=self.read_interval)
+        self.ser = ser
+        self.last_read_time = time.time()
+        self.buffer = ByteRingBuffer()
+        self.raw_capture = None
+        # 8N1 framing: 10 bits on the wire per byte. The port's own line rate
+        # wins, so the simulator's byte times match its frame rate.
+        self.baudrate = getattr(ser, 'baudrate', None) or baudrate
+        self.byte_time = 10.0 / self.baudrate
+        self.last_frame_time = -np.inf
+        # Optional device-side frame counter: byte offset of a big-endian
+        # uint16 inside the frame and the device's sample period in seconds.
+        self.sequence_offset = None
+        self.sample_period = None
+        self._sequence_anchor = None
+        # Outbound commands, keyed by (channel, method) so superseded
+        # set-points coalesce before they are written.
+        self._command_lock = threading.Lock()
+        self._pending_commands = OrderedDict()
+        self._awaiting_ack = {}
+        self._last_command_write = 0.0
+        self.command_interval = 0.002
+        self.ack_tolerance = 0.05
+        self.ack_min_tolerance = 2.0
+        self.ack_timeout = 2.0
+        self.command_results = deque(maxlen=1000)
+        # Set-point in force per channel, attached to every decoded frame so
+        # logs carry command and response side by side.
+        self.active_setpoint = np.full(len(CHANNELS), np.nan)
+        self.active_mode = np.zeros(len(CHANNELS), dtype=np.uint8)
+        self._setpoint_changes = deque()
+        self.alarms = AlarmBus()
+        # Called with every decoded batch on the acquisition thread; must
+        # not block (see TelemetryServer.publish).
+        self.subscribers = []
+        self.commands_sent = 0
+        self.commands_acked = 0
+        self.commands_timed_out = 0
+    
+    CHANNEL_MAP = {'CH1': 1, 'CH2': 2, 'CH3': 3}
+    METHOD_MAP = SETPOINT_MODES
+
+    def build_packet(self, channel, method, value):
+        if channel not in self.CHANNEL_MAP or method not in self.METHOD_MAP:
+            raise ValueError(f"Invalid channel or method: {channel}, {method}")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Value is not a valid float")
+
+        int_value = max(0, min(int(value), 65535))
+        high_byte = (int_value >> 8) & 0xFF
+        low_byte = int_value & 0xFF
+        return bytes([
+            ord('<'),
+            ord(':'),
+            self.CHANNEL_MAP[channel],
+            ord(':'),             
+            self.METHOD_MAP[method],  
+            ord(':'),            
+            high_byte,
+            low_byte,
+            ord(':'),
+            ord('>')
+        ])
+
+    def queue_command(self, channel, method, value):
+        # Called from any thread; the I/O worker writes it on its next pass.
+        # A newer set-point for the same channel/method replaces one that
+        # has not been written yet. Raises ValueError for invalid input.
+        packet = self.build_packet(channel, method, value)
+        with self._command_lock:
+            self._pending_commands.pop((channel, method), None)
+            self._pending_commands[(channel, method)] = (float(value), packet)
+        cancel_read = getattr(self.ser, 'cancel_read', None)
+        if cancel_read:
+            # Wake a reader blocked in read() so the command goes out now.
+            cancel_read()
+
+    def flush_commands(self):
+        # Writes every pending command in a single write, at most once per
+        # command_interval.
+        now = time.perf_counter()
+        if now - self._last_command_write < self.command_interval:
+            return 0
+        with self._command_lock:
+            if not self._pending_commands:
+                return 0
+            pending, self._pending_commands = self._pending_commands, OrderedDict()
+        try:
+            self.ser.write(b''.join(packet for _, packet in pending.values()))
         except Exception as e:
             print(f"[ERROR] Exception during send: {e}")
-            return False
+            return 0
+        sent = time.perf_counter()
+        self._last_command_write = sent
+        for key, (value, _) in pending.items():
+            self._awaiting_ack[key] = (value, sent)
+            self._setpoint_changes.append((sent, CHANNELS.index(key[0]), self.METHOD_MAP[key[1]], value))
+        self.commands_sent += len(pending)
+        return len(pending)
+
+    def check_acks(self, times, values):
+        # A command is acknowledged by the first telemetry frame whose
+        # readback of the commanded quantity is within tolerance.
+        if not self._awaiting_ack:
+            return
+        for (channel, method), (target, sent) in list(self._awaiting_ack.items()):
+            c = CHANNELS.index(channel)
+            readback = values[:, c, METRIC_KEYS.index(method)]
+            tolerance = max(abs(target) * self.ack_tolerance, self.ack_min_tolerance)
+            hits = np.flatnonzero((times >= sent) & (np.abs(readback - target) <= tolerance))
+            if len(hits):
+                rtt = float(times[hits[0]] - sent)
+                self.command_results.append((channel, method, target, 'ack', rtt))
+                self.commands_acked += 1
+                del self._awaiting_ack[(channel, method)]
+
+    def expire_acks(self, now):
+        # Runs on every read pass, frames or not, so commands to a device
+        # that has gone silent still time out.
+        for (channel, method), (target, sent) in list(self._awaiting_ack.items()):
+            if now - sent > self.ack_timeout:
+                self.command_results.append((channel, method, target, 'timeout', None))
+                self.commands_timed_out += 1
+                del self._awaiting_ack[(channel, method)]
+
+    def command_stats(self):
+        rtts = [r[4] for r in self.command_results if r[3] == 'ack']
+        return {
+            'sent': self.commands_sent,
+            'acked': self.commands_acked,
+            'timeouts': self.commands_timed_out,
+            'pending': len(self._pending_commands) + len(self._awaiting_ack),
+            'last': self.command_results[-1] if self.command_results else None,
+            'rtt_mean_ms': 1000 * sum(rtts) / len(rtts) if rtts else None
+        }
 
     def get_data(self):
         try:
-            if self.ser.in_waiting > 0:
-
-                new_data = self.ser.read(self.ser.in_waiting)
-                self.buffer.extend(new_data)
-                
-
-                result = None
-                while True:
-                    start = self.buffer.find(b'<:')
-                    end = self.buffer.find(b':>', start)
-                    
-                    if start != -1 and end != -1 and end > start:
-                        line_end = end + 2
-                        raw_data = self.buffer[start:line_end]
-                        self.buffer = self.buffer[line_end:] 
-                        
-
-                        str_line = raw_data.decode('utf-8', errors="ignore").strip()
-  
-                        if not str_line:
-                            continue  
-                        
-                        elapsed_time = time.time()
-                        result = {"time": elapsed_time}
-                        for channel in ["CH1", "CH2", "CH3"]:
-                            result[channel] = {
-                                "V": 0,
-                                "I": 0,
-                                "R": 0,
-                                "P": 0
-                            }
-
-                        G1 = 0
-                        G2 = 0
-                        G3 = 0
-
-                        try:
-                            if len(raw_data) > 3:
-                                V1_val = raw_data[2] * 256 + raw_data[3]
-                                if V1_val > 30000:
-                                    V1_val = 30000
-                                result["CH1"]["V"] = V1_val
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH1 V: {e}")
-                            
-                        try:
-                            if len(raw_data) > 6:
-                                I1_val = raw_data[5] * 256 + raw_data[6]
-                                if I1_val > 1000:
-                                    I1_val = 1000
-                                result["CH1"]["I"] = I1_val
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH1 I: {e}")
-                        
-                        try:
-                            if len(raw_data) > 10:
-                                G1 = raw_data[9] * 256 + raw_data[10]
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH1 G: {e}")
-                            G1 = 0
-                            
-                        if result["CH1"]["I"] != 0:
-                            result["CH1"]["R"] = result["CH1"]["V"] / result["CH1"]["I"]
-                        else:
-                            result["CH1"]["R"] = 10000
-                        result["CH1"]["P"] = result["CH1"]["V"] * result["CH1"]["I"] / 1000
-                            
-                        
-                        try:
-                            if len(raw_data) > 13:
-                                V2_val = raw_data[12] * 256 + raw_data[13]
-                                if V2_val > 30000:
-                                    V2_val = 30000
-                                result["CH2"]["V"] = V2_val
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH2 V: {e}")
-                            
-                        try:
-                            if len(raw_data) > 16:
-                                I2_val = raw_data[15] * 256 + raw_data[16]
-                                if I2_val > 1000:
-                                    I2_val = 1000
-                                result["CH2"]["I"] = I2_val
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH2 I: {e}")
-                            
-                        try:
-                            if len(raw_data) > 20:
-                                G2 = raw_data[19] * 256 + raw_data[20]
-                        except (IndexError, TypeError, ZeroDivisionError) as e:
-                            print(f"Error reading CH2 G: {e}")
-                            G2 = 0
-
-                        if result["CH2"]["I"] != 0:
-                            result["CH2"]["R"] = result["CH2"]["V"] / result["CH2"]["I"]
-                        else:
-                            result["CH2"]["R"] = 10000
-                        result["CH2"]["P"] = result["CH2"]["V"] * result["CH2"]["I"] / 1000
-                            
-                        
-                        try:
-                            if len(raw_data) > 23:
-                                V3_val = raw_data[22] * 256 + raw_data[23] 
-                                if V3_val > 30000:
-                                    V3_val = 30000
-                                result["CH3"]["V"] = V3_val
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH3 V: {e}")
-
-                        try:
-                            if len(raw_data) > 26:
-                                I3_val = raw_data[25] * 256 + raw_data[26]
-                                if I3_val > 1000:
-                                    I3_val = 1000
-                                result["CH3"]["I"] = I3_val
-                        except (IndexError, TypeError) as e:
-                            print(f"Error reading CH3 I: {e}")
-                            
-                        try:
-                            if len(raw_data) > 30:
-                                G3 = raw_data[29] * 256 + raw_data[30]
-                        except (IndexError, TypeError, ZeroDivisionError) as e:
-                            print(f"Error reading CH3 G: {e}")
-                            G3 = 0
-                            
-                        if result["CH3"]["I"] != 0:
-                            result["CH3"]["R"] = result["CH3"]["V"] / result["CH3"]["I"]
-                        else:
-                            result["CH3"]["R"] = 10000
-                        result["CH3"]["P"] = result["CH3"]["V"] * result["CH3"]["I"] / 1000
-                            
-                    else:
-                        break
-                        
-                if len(self.buffer) > 1024:
-                    self.buffer = self.buffer[-100:]
-                
-                return result if result else {}
+            self.flush_commands()
+            # Blocks for at most read_interval when the port is idle, so the
+            # acquisition thread can wait here without spinning.
+            # Anything that does not fit in the receive buffer stays in the OS
+            # buffer until the next call.
+            to_read = min(max(1, self.ser.in_waiting), self.buffer.free())
+            new_data = self.ser.read(to_read)
+            if new_data:
+                arrival_ns = time.perf_counter_ns()
+                self.last_read_time = time.time()
+                if self.raw_capture:
+                    self.raw_capture.write(new_data, arrival_ns)
+                batch = self.feed(new_data, arrival_ns)
             else:
-                return {}
+                batch = {}
+            self.expire_acks(time.perf_counter())
+            return batch
+        except OSError:
+            # SerialException included: the port is gone (e.g. unplugged),
+            # so retrying would only spin. The caller stops acquisition.
+            raise
         except Exception as e:
             print(f"Error receiving data: {e}")
             return {}
-    def create_notification(self):
-        try:
-            bytes_to_read = min(35, self.ser.in_waiting) 
-            new_data = self.ser.read(bytes_to_read)
-                
-            temp_buffer = bytearray()
-            temp_buffer.extend(new_data)
-                
-            if b'\n' in temp_buffer:
-                line_end = temp_buffer.find(b'\n')
-                str_line = temp_buffer[:line_end].decode('utf-8', errors="ignore").strip()
-            
-            if len(str_line) <= 34:
-                return
-                
+
+    def feed(self, data, arrival_ns):
+        # Decode path shared by the live port and offline re-parsing.
+        # arrival_ns is the perf_counter_ns() at which the last byte of data
+        # was read.
+        self.buffer.write(data)
+        pending = self.buffer.peek()
+        values, gains, flags, starts, consumed = decode_frames(pending)
+
+        if not len(values):
+            self.buffer.consume(consumed)
+            return {}
+
+        times = self.frame_times(pending, starts, arrival_ns)
+        self.buffer.consume(consumed)
+        self.check_acks(times, values)
+        self.alarms.publish_flags(times, flags)
+        setpoints, modes = self.frame_setpoints(times)
+        # Columnar batch: values has shape (n_frames, channel, metric)
+        # ordered as CHANNELS x METRIC_KEYS.
+        batch = {
+            "time": times,
+            "values": values,
+            "G": gains,
+            "flags": flags,
+            "setpoint": setpoints,
+            "mode": modes
+        }
+        for callback in self.subscribers:
             try:
-                Flags = ord(str_line[34])
-                Flagsbyte = format(Flags, '08b')
-                
+                callback(batch)
+            except Exception as e:
+                print(f"Error in batch subscriber: {e}")
+        return batch
+
+    def frame_setpoints(self, times):
+        # Per-frame set-point and mode: frames stamped after a command was
+        # written carry the new value.
+        n = len(times)
+        setpoints = np.tile(self.active_setpoint, (n, 1))
+        modes = np.tile(self.active_mode, (n, 1))
+        while self._setpoint_changes:
+            try:
+                sent, c, mode, value = self._setpoint_changes.popleft()
+            except IndexError:
+                break
+            later = times >= sent
+            setpoints[later, c] = value
+            modes[later, c] = mode
+            self.active_setpoint[c] = value
+            self.active_mode[c] = mode
+        return setpoints, modes
+
+    def frame_times(self, pending, starts, arrival_ns):
+        # The newest byte in pending arrived at arrival_ns; each earlier byte
+        # arrived one byte time before the next, so a frame is stamped with
+        # the time its last byte came in.
+        frame_ends = starts + FRAME_SIZE
+        times = arrival_ns / 1e9 - (len(pending) - frame_ends) * self.byte_time
+
+        if self.sequence_offset is not None and self.sample_period:
+            arr = np.frombuffer(pending, dtype=np.uint8)
+            offsets = starts + self.sequence_offset
+            sequence = arr[offsets].astype(np.int64) * 256 + arr[offsets + 1]
+            times = self.sequence_times(sequence, times)
+
+        # Never step backwards across chunks.
+        times = np.maximum.accumulate(np.maximum(times, self.last_frame_time))
+        self.last_frame_time = times[-1]
+        return times
+
+    def sequence_times(self, sequence, fallback_times):
+        # Unwrap the 16-bit counter and place frames on the device's own
+        # sample clock, re-anchoring if it drifts away from arrival times
+        # (device reset, dropped frames beyond a wrap).
+        if self._sequence_anchor is None:
+            self._sequence_anchor = (int(sequence[0]), float(fallback_times[0]), int(sequence[0]))
+        anchor_seq, anchor_time, last_seq = self._sequence_anchor
+        steps = np.diff(np.concatenate([[last_seq], sequence])) % 65536
+        unwrapped = (last_seq - anchor_seq) + np.cumsum(steps)
+        times = anchor_time + unwrapped * self.sample_period
+        if abs(times[-1] - fallback_times[-1]) > 0.5:
+            self._sequence_anchor = (int(sequence[-1]), float(fallback_times[-1]), int(sequence[-1]))
+            return fallback_times
+        self._sequence_anchor = (anchor_seq, anchor_time, anchor_seq + int(unwrapped[-1]))
+        return times
+
+    def start_raw_capture(self, file_path=None):
+        if file_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            os.makedirs("logs", exist_ok=True)
+            file_path = os.path.join("logs", f"serial_raw_{timestamp}.raw")
+        self.raw_capture = RawCapture(file_path)
+        return file_path
 
-                if len(Flagsbyte) >= 8:
-                    if Flagsbyte[0] == '1':
-                        messagebox.showinfo("Error: Temperature exceeded 70°C.\
-                                \nSystem shut down to prevent damage.\
-                                \nPlease restart manually after cooling.")
-                    
-                    if Flagsbyte[1] == '1':
-                        messagebox.showinfo("Error: Channel 1 current limit exceeded.\
-                                \nMaximum allowed current is 1A.")
-                    
-                    if Flagsbyte[2] == '1':
-                        messagebox.showinfo("Error: Channel 2 current limit exceeded.\
-                                \nMaximum allowed current is 1A.")
-                    
-                    if Flagsbyte[3] == '1':
-                        messagebox.showinfo("Error: Channel 3 current limit exceeded.\
-                                \nMaximum allowed current is 1A.")
-            except (IndexError, TypeError, ValueError) as e:
-                print(f"Error processing flags: {e}")
-                
-        except Exception as e:
-            print(f"Error in create_notification: {e}")
+    def stop_raw_capture(self):
+        if self.raw_capture:
+            capture, self.raw_capture = self.raw_capture, None
+            capture.close()
 
     def close(self):
-        if self.ser.is_open:
+        self.stop_raw_capture()
+        if self.ser is not None and self.ser.is_open:
             self.ser.close()
 
+class DeviceSession:
+    """One board in a multi-device setup: its own port, acquisition thread,
+    history store and optional log.
+
+    All sessions share a perf_counter start time, so their relative
+    timestamps are on one merged time base. The acquisition thread appends
+    to the history under `lock`; readers take the same lock.
+    """
+
+    def __init__(self, port, start_time, history_capacity=4096):
+        self.port = port
+        self.start_time = start_time
+        self.handler = SerialCommunicationHandler(port)
+        self.history = HistoryStore(history_capacity)
+        self.logger = Logger()
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.last_values = None
+        self.last_flags = 0
+        self.error = None
+        self.running = False
+        self.thread = None
+
+    def start(self, log=False):
+        if log:
+            safe_port = "".join(ch if ch.isalnum() else "_" for ch in self.port)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            os.makedirs("logs", exist_ok=True)
+            self.logger.start_logging(os.path.join("logs", f"serial_data_{safe_port}_{timestamp}.bin"))
+            self.handler.alarms.log_path = os.path.join("logs", f"alarms_{safe_port}_{timestamp}.log")
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            try:
+                batch = self.handler.get_data()
+            except OSError as e:
+                with self.lock:
+                    self.error = str(e)
+                self.running = False
+                break
+            if not batch:
+                continue
+            relative_times = batch['time'] - self.start_time
+            if self.logger.is_logging:
+                self.logger.log_batch(relative_times, batch)
+            with self.lock:
+                self.history.append(relative_times, batch['values'])
+                self.frames += len(relative_times)
+                self.last_values = batch['values'][-1]
+                self.last_flags = int(batch['flags'][-1])
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'frames': self.frames,
+                'values': None if self.last_values is None else self.last_values.copy(),
+                'flags': self.last_flags,
+                'dropped_bytes': self.handler.buffer.dropped_bytes,
+                'error': self.error
+            }
+
+    def query(self, t_start, t_end, max_points):
+        with self.lock:
+            return self.history.query(t_start, t_end, max_points)
+
+    def latest_time(self):
+        with self.lock:
+            return self.history.latest_time()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        self.handler.close()
+        self.logger.close()
+
+
+def ramp_profile(start, stop, duration, rate=10.0):
+    # Linear ramp from start to stop over duration seconds, rate updates/s.
+    n = max(int(round(duration * rate)), 1)
+    times = np.linspace(0.0, duration, n + 1)
+    return list(zip(times.tolist(), np.linspace(start, stop, n + 1).tolist()))
+
+
+def staircase_profile(start, step, steps, dwell):
+    # Step test: start, start+step, ... held for dwell seconds each.
+    return [(i * dwell, start + i * step) for i in range(int(steps) + 1)]
+
+
+def sine_profile(offset, amplitude, period, duration, rate=10.0):
+    # Sine sweep around offset, sampled at rate updates/s.
+    times = np.arange(0.0, duration + 1e-9, 1.0 / rate)
+    values = offset + amplitude * np.sin(2 * np.pi * times / period)
+    return list(zip(times.tolist(), values.tolist()))
+
+
+def load_profile_csv(file_path, channel=None, method=None):
+    """Read a set-point profile from CSV.
+
+    Rows are either `time,value` (channel and method then come from the
+    arguments) or `time,channel,method,value`. A header row is skipped.
+    Returns events sorted by time as (t, channel, method, value).
+    """
+    events = []
+    with open(file_path, newline='') as f:
+        for row in csv.reader(f):
+            row = [cell.strip() for cell in row]
+            if not row or not row[0] or row[0].startswith('#'):
+                continue
+            try:
+                t = float(row[0])
+            except ValueError:
+                continue  # header
+            if len(row) >= 4:
+                events.append((t, row[1], row[2], float(row[3])))
+            elif channel is not None and method is not None:
+                events.append((t, channel, method, float(row[1])))
+            else:
+                raise ValueError("time,value rows need a channel and method")
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+class SetpointSequencer:
+    """Plays a timed list of set-points into a SerialCommunicationHandler.
+
+    Events are (t, channel, method, value) with t in seconds from start().
+    The worker sleeps until shortly before each deadline and spins on
+    perf_counter for the rest, so events are queued within a fraction of a
+    millisecond of their schedule; the I/O worker writes them on its next
+    pass. Lateness of each dispatch is kept for the stats.
+    """
+
+    SPIN_WINDOW = 0.001
+
+    def __init__(self, handler, events):
+        for _, channel, method, value in events:
+            handler.build_packet(channel, method, value)  # validate up front
+        self.handler = handler
+        self.events = sorted(events, key=lambda e: e[0])
+        self.index = 0
+        self.lateness = []
+        self.start_time = None
+        self._stop = threading.Event()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def duration(self):
+        return self.events[-1][0] if self.events else 0.0
+
+    def start(self):
+        self._stop.clear()
+        self.index = 0
+        self.lateness = []
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        for t, channel, method, value in self.events:
+            deadline = self.start_time + t
+            remaining = deadline - time.perf_counter()
+            if remaining > self.SPIN_WINDOW and self._stop.wait(remaining - self.SPIN_WINDOW):
+                return
+            if self._stop.is_set():
+                return
+            while time.perf_counter() < deadline:
+                pass
+            self.handler.queue_command(channel, method, value)
+            self.lateness.append(time.perf_counter() - deadline)
+            self.index += 1
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def stats(self):
+        late = np.array(self.lateness) if self.lateness else np.zeros(1)
+        return {
+            'sent': self.index,
+            'total': len(self.events),
+            'elapsed': 0.0 if self.start_time is None else time.perf_counter() - self.start_time,
+            'late_mean_ms': float(late.mean() * 1000),
+            'late_max_ms': float(late.max() * 1000)
+        }
+
+
 class AdvancedSerialMonitor:
     def __init__(self, root):
         self.root = root
         self.root.title("🚀 Advanced Serial Monitor Pro")
-        self.root.geometry("1000x600")
-        self.data_queue = queue.Queue()
+        self.root.geometry("1400x600")
+        self.QUEUE_SIZE = 1000
+        self.POLL_INTERVAL = 20
+        self.data_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.dropped_batches = 0
         self.running = False
         self.data_thread = None
+        self.poll_job = None
         self.plotting_thread = None
         try:
             self.root.iconbitmap("serial_port.ico")
         except:
             pass
-        self.MAX_POINTS = 200 
-        self.data_buffer = {f'CH{i}': {} for i in range(1, 4)}
-        self.cleanup_interval = 10000
-        self.last_cleanup = time.time()
+        self.MAX_POINTS = 4096 
+        self.history = HistoryStore(self.MAX_POINTS)
+        self.stats = RunningStats()
+        self.STATS_TABLE_INTERVAL = 0.5
+        self.last_stats_table_update = 0.0
         self.FONT = ("Segoe UI", 11, "bold")
         self.serial_connection = None
         self.connection_status = False
+        self.replay = None
+        self.replay_window = None
+        self.dashboard = None
+        self.sequencer = None
+        self.sequencer_window = None
+        self.alarm_window = None
+        self.toast = None
+        self.toast_job = None
+        self.TOAST_MS = 4000
+        self.NOTIFY_COLORS = {'info': '', 'warning': 'orange', 'error': 'red'}
+        self.SEQUENCE_PROFILES = {
+            'Ramp': [('Start', 0.0), ('Stop', 100.0), ('Duration (s)', 10.0), ('Rate (Hz)', 10.0)],
+            'Staircase': [('Start', 0.0), ('Step', 10.0), ('Steps', 10), ('Dwell (s)', 1.0)],
+            'Sine': [('Offset', 50.0), ('Amplitude', 50.0), ('Period (s)', 5.0),
+                     ('Duration (s)', 20.0), ('Rate (Hz)', 20.0)]
+        }
+        self.REPLAY_STEP = 0.02
+        self.REPLAY_SPEEDS = ['0.25', '0.5', '1', '2', '5', '10', '50', '200']
         self.plot_settings = {
             'auto_scale': tk.BooleanVar(value=True),
             'grid_enabled': tk.BooleanVar(value=True),
             'legend_enabled': tk.BooleanVar(value=True),
-            'update_interval': tk.IntVar(value=100)
+            'min_fps': tk.IntVar(value=5),
+            'max_fps': tk.IntVar(value=30),
+            'follow_live': tk.BooleanVar(value=True),
+            'window_seconds': tk.DoubleVar(value=20.0)
         }
         self.channel_vars = {f'CH{i}': tk.BooleanVar() for i in range(1, 4)}
+        self.auto_capture = tk.BooleanVar(value=False)
+        self.raw_capture_enabled = tk.BooleanVar(value=False)
+        self.serve_enabled = tk.BooleanVar(value=False)
+        self.telemetry_server = None
+        self.TELEMETRY_PORT = 8765
         self.plot_configurations = {}
         self.metrics = ['Voltage', 'Current', 'Resistance', 'Power']
         self.metric_keys = {
@@ -328,15 +1795,22 @@ class AdvancedSerialMonitor:
             'Resistance': {'color': 'green', 'ylabel': 'Resistance (Ω)'},
             'Power': {'color': 'purple', 'ylabel': 'Power (mW)'}
         }
-        self.data_buffer = {f'CH{i}': {} for i in range(1, 4)}
-        self.MAX_POINTS = 200 
         self.plot_windows = {}
-        self.anim = None
+        self.render_job = None
+        self.frame_rate = FrameRateController()
+        self.STATS_INTERVAL = 0.5
+        self.last_stats_update = 0.0
+        self.SCROLL_HEADROOM = 0.2
+        # Auto Scale re-fits the y-axes at most this often (seconds); every
+        # change of limits costs one full redraw.
+        self.AUTOSCALE_INTERVAL = 1.0
+        self.last_autoscale = 0.0
+        self.plot_settings['auto_scale'].trace_add('write', lambda *args: self.on_auto_scale_toggled())
+        self.PLOTTING_PRELOAD_DELAY = 200
         self.start_time = None
         self.logger = Logger()
         self.is_plotting_paused = False
         self.metric_checkbuttons = {}
-        self.buffered_data = []
         self.metric_y_ranges = {
             'I': (0, 1000),      
             'V': (0, 30000),   
@@ -345,17 +1819,20 @@ class AdvancedSerialMonitor:
             }
         self.setup_ui()
         self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after_idle(self.refresh_ports)
+        self.root.after(self.PLOTTING_PRELOAD_DELAY, self.preload_plotting)
+
+    def preload_plotting(self):
+        threading.Thread(target=load_plotting, daemon=True).start()
     
     def setup_ui(self):
-        plt.rcParams['figure.autolayout'] = False
-        plt.rcParams['toolbar'] = 'None'  
-        
         port_frame = ttk.LabelFrame(self.root, text=" 🔌 Serial Port ", padding=(10, 5))
         port_frame.grid(row=0, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
         
 
         ttk.Label(port_frame, text="Port:").grid(row=0, column=0)
-        self.port_combo = ttk.Combobox(port_frame, values=self.get_available_ports(), state="readonly")
+        # Ports are enumerated after the first paint; it can take a while on Windows.
+        self.port_combo = ttk.Combobox(port_frame, values=[], state="readonly")
         self.port_combo.grid(row=0, column=1, padx=5)
         
 
@@ -371,6 +1848,33 @@ class AdvancedSerialMonitor:
         self.logging_button = ttk.Button(port_frame, text="📝 Start Logging", command=self.toggle_logging)
         self.logging_button.grid(row=0, column=5, padx=5)
 
+        ttk.Checkbutton(
+            port_frame,
+            text="💾 Capture on Connect",
+            variable=self.auto_capture
+        ).grid(row=0, column=6, padx=5)
+
+        ttk.Checkbutton(
+            port_frame,
+            text="🧾 Raw Capture",
+            variable=self.raw_capture_enabled
+        ).grid(row=0, column=7, padx=5)
+
+        ttk.Button(port_frame, text="📂 Replay Log", command=self.open_replay).grid(row=0, column=8, padx=5)
+        ttk.Button(port_frame, text="🧰 Multi-Device", command=self.open_dashboard).grid(row=0, column=9, padx=5)
+        ttk.Checkbutton(
+            port_frame,
+            text="📡 Stream Server",
+            variable=self.serve_enabled
+        ).grid(row=0, column=10, padx=5)
+
+        status_frame = ttk.Frame(self.root, padding=(10, 2))
+        status_frame.grid(row=2, column=0, columnspan=3, sticky="ew")
+        self.status_label = ttk.Label(status_frame, text="Ready", anchor='w')
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.alarm_button = ttk.Button(status_frame, text="🚨 Alarms (0)", command=self.open_alarm_log)
+        self.alarm_button.pack(side=tk.RIGHT)
+
         channel_frame = ttk.LabelFrame(self.root, text=" 🖥️ Channel Configuration ", padding=(10, 5))
         channel_frame.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
         
@@ -432,13 +1936,19 @@ class AdvancedSerialMonitor:
             ).grid(row=0, column=4)
         
 
+        self.command_status_label = ttk.Label(channel_frame, text="")
+        self.command_status_label.grid(row=len(self.channel_vars) + 3, column=0, columnspan=5, sticky='w')
+        ttk.Button(channel_frame, text="🎛️ Sequencer", command=self.open_sequencer).grid(
+            row=len(self.channel_vars) + 4, column=0, columnspan=2, sticky='w', pady=5)
+
         plot_control_frame = ttk.LabelFrame(self.root, text=" 📊 Plot Controls ", padding=(10, 5))
         plot_control_frame.grid(row=1, column=1, padx=10, pady=5, sticky="nsew")
         
         controls = [
             ("Auto Scale", self.plot_settings['auto_scale']),
             ("Show Grid", self.plot_settings['grid_enabled']),
-            ("Show Legend", self.plot_settings['legend_enabled'])
+            ("Show Legend", self.plot_settings['legend_enabled']),
+            ("Follow Live", self.plot_settings['follow_live'])
         ]
         
         for i, (label, var) in enumerate(controls):
@@ -448,13 +1958,34 @@ class AdvancedSerialMonitor:
                 variable=var
             ).grid(row=i, column=0, sticky='w')
         
-        ttk.Label(plot_control_frame, text="Update Interval (ms):").grid(row=len(controls), column=0)
-        ttk.Scale(
-            plot_control_frame, 
-            from_=10, 
-            to=200, 
-            variable=self.plot_settings['update_interval']
-        ).grid(row=len(controls)+1, column=0, sticky='ew')
+        ttk.Label(plot_control_frame, text="Frame Rate (FPS):").grid(row=len(controls), column=0, sticky='w')
+        fps_frame = ttk.Frame(plot_control_frame)
+        fps_frame.grid(row=len(controls)+1, column=0, sticky='ew')
+        ttk.Label(fps_frame, text="Min:").grid(row=0, column=0)
+        ttk.Spinbox(
+            fps_frame,
+            from_=1,
+            to=60,
+            textvariable=self.plot_settings['min_fps'],
+            width=4
+        ).grid(row=0, column=1, padx=5)
+        ttk.Label(fps_frame, text="Max:").grid(row=0, column=2)
+        ttk.Spinbox(
+            fps_frame,
+            from_=1,
+            to=60,
+            textvariable=self.plot_settings['max_fps'],
+            width=4
+        ).grid(row=0, column=3, padx=5)
+
+        window_frame = ttk.Frame(plot_control_frame)
+        window_frame.grid(row=len(controls)+2, column=0, sticky='ew')
+        ttk.Label(window_frame, text="Window (s):").grid(row=0, column=0)
+        ttk.Entry(
+            window_frame,
+            textvariable=self.plot_settings['window_seconds'],
+            width=8
+        ).grid(row=0, column=1, padx=5)
         
 
         button_frame = ttk.Frame(plot_control_frame)
@@ -480,12 +2011,57 @@ class AdvancedSerialMonitor:
             state="disabled"
         )
         self.resume_button.grid(row=0, column=2, sticky='ew', padx=2)
+
+        self.render_stats_label = ttk.Label(plot_control_frame, text="FPS: -- | Draw: -- ms")
+        self.render_stats_label.grid(row=len(controls)+4, column=0, sticky='w')
+
+        stats_frame = ttk.LabelFrame(self.root, text=" 📐 Statistics ", padding=(10, 5))
+        stats_frame.grid(row=1, column=2, padx=10, pady=5, sticky="nsew")
+        columns = ('Signal', 'Min', 'Max', 'Mean', 'RMS', 'Std')
+        self.stats_table = ttk.Treeview(stats_frame, columns=columns, show='headings',
+                                        height=len(CHANNELS) * len(METRIC_KEYS))
+        for column in columns:
+            self.stats_table.heading(column, text=column)
+            self.stats_table.column(column, width=70, anchor='e')
+        self.stats_table.column('Signal', width=60, anchor='w')
+        for ch in CHANNELS:
+            for key in METRIC_KEYS:
+                self.stats_table.insert('', tk.END, iid=f"{ch}_{key}", values=(f"{ch} {key}",))
+        self.stats_table.grid(row=0, column=0, columnspan=2, sticky='nsew')
+        self.stats_summary_label = ttk.Label(stats_frame, text="", justify=tk.LEFT)
+        self.stats_summary_label.grid(row=1, column=0, sticky='w', pady=5)
+        ttk.Button(stats_frame, text="🔄 Reset", command=self.reset_stats).grid(row=1, column=1, sticky='e')
     
+    def update_stats_table(self):
+        stats = self.stats
+        if not stats.count:
+            return
+        columns = (stats.min, stats.max, stats.mean, stats.rms, stats.std)
+        for c, ch in enumerate(CHANNELS):
+            for m, key in enumerate(METRIC_KEYS):
+                self.stats_table.item(
+                    f"{ch}_{key}",
+                    values=[f"{ch} {key}"] + [f"{column[c, m]:.1f}" for column in columns]
+                )
+        charge, energy = stats.charge(), stats.energy()
+        lines = [f"{stats.count:,} samples over {stats.duration:.1f} s"] + [
+            f"{ch}: Q = {charge[c]:.1f} mC, E = {energy[c]:.1f} mJ" for c, ch in enumerate(CHANNELS)
+        ]
+        self.stats_summary_label.config(text="\n".join(lines))
+
+    def reset_stats(self):
+        self.stats.reset()
+        for ch in CHANNELS:
+            for key in METRIC_KEYS:
+                self.stats_table.item(f"{ch}_{key}", values=(f"{ch} {key}",))
+        self.stats_summary_label.config(text="")
+
     def toggle_logging(self):
         if not self.logger.is_logging:
             file_path = filedialog.asksaveasfilename(
-                defaultextension=".txt",
-                filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+                # Binary first: only .bin logs can be opened with Replay Log.
+                defaultextension=".bin",
+                filetypes=[("Binary log (replayable)", "*.bin"), ("CSV text", "*.txt *.csv"), ("All files", "*.*")],
                 title="Select log file location"
             )
             
@@ -493,42 +2069,28 @@ class AdvancedSerialMonitor:
                 success, msg = self.logger.start_logging(file_path)
                 if success:
                     self.logging_button.config(text="📝 Stop Logging")
-                    messagebox.showinfo("Logging Started", f"Logging data to: {msg}")
+                    self.notify(f"Logging data to: {msg}")
                 else:
-                    messagebox.showerror("Logging Error", f"Failed to start logging: {msg}")
+                    self.notify(f"Failed to start logging: {msg}", 'error')
         else:
             self.logger.close()
             self.logging_button.config(text="📝 Start Logging")
-            messagebox.showinfo("Logging Stopped", "Data logging has been stopped")
+            self.notify("Data logging has been stopped")
     
     def pause_plotting(self):
-        if self.anim and not self.is_plotting_paused:
-            self.anim.event_source.stop()
+        if self.render_job and not self.is_plotting_paused:
+            self.stop_animation()
             self.is_plotting_paused = True
             self.pause_button.config(state="disabled")
             self.resume_button.config(state="normal")
-            self.buffered_data = []
     
     def resume_plotting(self):
         if self.is_plotting_paused:
             self.is_plotting_paused = False
             
-            interval = self.plot_settings['update_interval'].get()
-            if self.plot_windows:
-                first_channel = list(self.plot_windows.keys())[0]
-                fig = self.plot_windows[first_channel]['figure']
-                
-
-                for channel_data in self.plot_windows.values():
-                    channel_data['canvas'].draw_idle()
-                
-                self.anim = animation.FuncAnimation(
-                    fig, 
-                    self.update_plot, 
-                    interval=interval,
-                    blit=True,
-                    cache_frame_data=False
-                )
+            for channel_data in self.plot_windows.values():
+                channel_data['renderer'].invalidate()
+            self.start_animation()
             
             self.pause_button.config(state="normal")
             self.resume_button.config(state="disabled")
@@ -536,7 +2098,7 @@ class AdvancedSerialMonitor:
 
     
     def get_available_ports(self):
-        return [port.device for port in serial.tools.list_ports.comports()]
+        return [port.device for port in serial.tools.list_ports.comports()] + [SIMULATOR_PORT]
     
     def refresh_ports(self):
         ports = self.get_available_ports()
@@ -549,23 +2111,284 @@ class AdvancedSerialMonitor:
         if not port:
             messagebox.showerror("Error", "No port selected!")
             return
+        if self.replay:
+            self.close_replay()
         
         try:
             self.serial_connection = SerialCommunicationHandler(port)
-            messagebox.showinfo("Success", f"Connected to {port}")
+            self.notify(f"Connected to {port}")
+            # Alarm events are appended next to the captures; the file is
+            # only created once the first alarm fires.
+            os.makedirs("logs", exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.serial_connection.alarms.log_path = os.path.join("logs", f"alarms_{timestamp}.log")
 
-            self.start_time = time.time()
+            self.start_time = time.perf_counter()
             self.connect_button.config(state="disabled")
             self.disconnect_button.config(state="normal")
             self.connection_status = True
+            if self.auto_capture.get() and not self.logger.is_logging:
+                # Unattended capture: binary log of every frame until disconnect.
+                success, msg = self.logger.start_logging(fmt='binary')
+                if success:
+                    self.logging_button.config(text="📝 Stop Logging")
+                else:
+                    self.notify(f"Failed to start logging: {msg}", 'error')
+            if self.raw_capture_enabled.get():
+                try:
+                    self.serial_connection.start_raw_capture()
+                except OSError as e:
+                    self.notify(f"Failed to start raw capture: {e}", 'error')
+            if self.serve_enabled.get():
+                self.start_telemetry_server()
+            self.start_acquisition()
         except Exception as e:
             messagebox.showerror("Connection Error", str(e))
+
+    def start_telemetry_server(self):
+        try:
+            self.telemetry_server = TelemetryServer(port=self.TELEMETRY_PORT)
+            url = self.telemetry_server.start()
+        except OSError as e:
+            self.telemetry_server = None
+            self.notify(f"Failed to start stream server: {e}", 'error')
+            return
+        self.serial_connection.subscribers.append(self.telemetry_server.publish)
+        self.notify(f"Connected; streaming NDJSON on {url}")
+
+    def stop_telemetry_server(self):
+        if self.telemetry_server:
+            self.telemetry_server.stop()
+            self.telemetry_server = None
+
+    def start_acquisition(self, target=None):
+        self.running = True
+        self.data_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.dropped_batches = 0
+        self.history.clear()
+        self.stats.reset()
+        self.data_thread = threading.Thread(target=target or self.acquisition_loop, daemon=True)
+        self.data_thread.start()
+        self.poll_job = self.root.after(self.POLL_INTERVAL, self.process_data_queue)
+
+    def stop_acquisition(self):
+        self.running = False
+        # Cancel the pending poll so a stop followed by a start in the same
+        # callback does not leave the old poll loop running alongside the new.
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        if self.data_thread is not None:
+            self.data_thread.join(timeout=2)
+            self.data_thread = None
+
+    def acquisition_loop(self):
+        # Runs on its own thread: drains the port as fast as the device sends,
+        # independent of the plot timer. Every frame is logged here, so logging
+        # does not depend on the GUI; the GUI only ever consumes data_queue.
+        while self.running and self.serial_connection:
+            try:
+                data = self.serial_connection.get_data()
+            except OSError as e:
+                # Port lost: hand it to the GUI thread, which disconnects.
+                self.enqueue({'port_lost': str(e)})
+                break
+            if not data:
+                continue
+            if self.logger.is_logging:
+                self.logger.log_batch(data['time'] - self.start_time, data)
+            self.enqueue(data)
+
+    def enqueue(self, data):
+        try:
+            self.data_queue.put_nowait(data)
+        except queue.Full:
+            # The GUI has fallen behind; drop the oldest entry rather than
+            # stalling acquisition.
+            try:
+                self.data_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped_batches += 1
+            self.data_queue.put_nowait(data)
+
+    def replay_loop(self):
+        # Replay counterpart of acquisition_loop: feeds logged batches into
+        # data_queue at the selected speed. It blocks instead of dropping when
+        # the GUI falls behind, since the data is not going anywhere.
+        last = time.perf_counter()
+        while self.running and self.replay:
+            time.sleep(self.REPLAY_STEP)
+            now = time.perf_counter()
+            items = self.replay.next_items(now - last)
+            last = now
+            for item in items:
+                while self.running:
+                    try:
+                        self.data_queue.put(item, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+
+    def process_data_queue(self):
+        self.poll_job = None
+        if not self.running:
+            return
+        try:
+            while True:
+                try:
+                    data = self.data_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.ingest_data(data)
+            if self.serial_connection:
+                self.update_command_status()
+                for event in self.serial_connection.alarms.drain():
+                    self.show_alarm(event)
+            now = time.perf_counter()
+            if now - self.last_stats_table_update >= self.STATS_TABLE_INTERVAL:
+                self.last_stats_table_update = now
+                self.update_stats_table()
+        except Exception as e:
+            print(f"Error processing data queue: {e}")
+        self.poll_job = self.root.after(self.POLL_INTERVAL, self.process_data_queue)
+
+    def ingest_data(self, data):
+        if 'port_lost' in data:
+            self.notify(f"Serial port lost: {data['port_lost']}", 'error')
+            self.root.after_idle(self.disconnect_serial)
+            return
+        if data.get('reset'):
+            # Replay seek: the history only holds monotonic time, and the
+            # statistics would otherwise integrate across the jump.
+            self.history.clear()
+            self.stats.reset()
+            return
+        if 'time' not in data or not len(data['time']):
+            return
+
+        if self.start_time is None:
+            self.start_time = data['time'][0]
+
+        relative_times = data['time'] - self.start_time
+        self.update_data_buffers(relative_times, data['values'])
     
+    def open_dashboard(self):
+        if self.dashboard and self.dashboard.window.winfo_exists():
+            self.dashboard.window.lift()
+            return
+        self.dashboard = MultiDeviceDashboard(self)
+
+    def open_replay(self):
+        if self.serial_connection:
+            self.notify("Disconnect the serial port before replaying a log!", 'warning')
+            return
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Binary log", "*.bin"), ("All files", "*.*")],
+            title="Select log file to replay"
+        )
+        if not file_path:
+            return
+        if self.replay:
+            self.close_replay()
+        try:
+            self.replay = LogReplay(file_path)
+        except Exception as e:
+            messagebox.showerror("Replay Error", f"Failed to open log: {e}")
+            return
+
+        self.start_time = 0.0
+        self.replay.preload = float(self.plot_settings['window_seconds'].get())
+        self.replay.seek(self.replay.start)
+        self.start_acquisition(self.replay_loop)
+        self.build_replay_window(os.path.basename(file_path))
+
+    def build_replay_window(self, title):
+        window = tk.Toplevel(self.root)
+        window.title(f"Replay: {title}")
+        window.protocol("WM_DELETE_WINDOW", self.close_replay)
+        self.replay_window = window
+
+        self.replay_play_button = ttk.Button(window, text="⏸️ Pause", command=self.toggle_replay)
+        self.replay_play_button.grid(row=0, column=0, padx=5, pady=5)
+
+        ttk.Label(window, text="Speed:").grid(row=0, column=1)
+        self.replay_speed_var = tk.StringVar(value='1')
+        speed_combo = ttk.Combobox(
+            window,
+            values=self.REPLAY_SPEEDS,
+            textvariable=self.replay_speed_var,
+            state="readonly",
+            width=5
+        )
+        speed_combo.grid(row=0, column=2, padx=5)
+        speed_combo.bind("<<ComboboxSelected>>", lambda event: self.set_replay_speed())
+
+        ttk.Label(window, text="Jump to (s):").grid(row=0, column=3)
+        self.replay_jump_entry = ttk.Entry(window, width=10)
+        self.replay_jump_entry.grid(row=0, column=4, padx=5)
+        ttk.Button(window, text="Go", command=self.jump_replay).grid(row=0, column=5, padx=5)
+
+        self.replay_position_var = tk.DoubleVar(value=self.replay.start)
+        ttk.Scale(
+            window,
+            from_=self.replay.start,
+            to=self.replay.end,
+            variable=self.replay_position_var,
+            command=lambda value: self.seek_replay(float(value)),
+            length=500
+        ).grid(row=1, column=0, columnspan=6, sticky='ew', padx=5)
+        self.replay_position_label = ttk.Label(window, text="")
+        self.replay_position_label.grid(row=2, column=0, columnspan=6, sticky='w', padx=5, pady=5)
+
+        self.update_replay_controls()
+
+    def update_replay_controls(self):
+        if not self.replay or not self.replay_window:
+            return
+        position = min(self.replay.position, self.replay.end)
+        self.replay_position_var.set(position)
+        self.replay_position_label.config(
+            text=f"{position:.2f} s / {self.replay.end:.2f} s  ({len(self.replay):,} frames)"
+        )
+        self.replay_window.after(200, self.update_replay_controls)
+
+    def toggle_replay(self):
+        if self.replay:
+            self.replay.playing = not self.replay.playing
+            self.replay_play_button.config(text="⏸️ Pause" if self.replay.playing else "▶️ Play")
+
+    def set_replay_speed(self):
+        if self.replay:
+            self.replay.speed = float(self.replay_speed_var.get())
+
+    def seek_replay(self, position):
+        if self.replay:
+            self.replay.preload = float(self.plot_settings['window_seconds'].get())
+            self.replay.seek(position)
+
+    def jump_replay(self):
+        try:
+            position = float(self.replay_jump_entry.get())
+        except ValueError:
+            self.notify("Invalid time!", 'error')
+            return
+        self.seek_replay(position)
+
+    def close_replay(self):
+        self.stop_acquisition()
+        if self.replay:
+            self.replay.close()
+            self.replay = None
+        if self.replay_window:
+            self.replay_window.destroy()
+            self.replay_window = None
+
     def disconnect_serial(self):
         if self.serial_connection:
             try:
-                if self.anim is not None and self.anim.event_source is not None:
-                    self.anim.event_source.stop()
+                self.stop_sequence()
+                self.stop_animation()
 
                 for channel_data in list(self.plot_windows.values()):
                     if channel_data.get('figure'):
@@ -574,6 +2397,8 @@ class AdvancedSerialMonitor:
                         channel_data['window'].destroy()
                 self.plot_windows.clear()
                 
+                self.stop_acquisition()
+                self.stop_telemetry_server()
                 self.serial_connection.close()
                 self.serial_connection = None
                 
@@ -587,30 +2412,240 @@ class AdvancedSerialMonitor:
                 self.resume_button.config(state="disabled")
                 self.connection_status = False
                 
-                messagebox.showinfo("Success", "Serial connection closed")
+                self.notify("Serial connection closed")
             except Exception as e:
                 print(f"Error while disconnecting serial: {e}")
     
     def send_channel_config(self, channel, method_var, value_entry):
         if not self.serial_connection:
-            messagebox.showwarning("Warning", "Connect to a serial port first!")
+            self.notify("Connect to a serial port first!", 'warning')
             return
         
         method = method_var.get()
         value = value_entry.get()
         
         if not method or not value:
-            messagebox.showwarning("Warning", "Fill all fields!")
+            self.notify("Fill all fields!", 'warning')
             return
         
         try:
-            success = self.serial_connection.send_channel_config(channel, method, float(value))
-            if success:
-                messagebox.showinfo("Success", f"{channel} configuration sent successfully!")
-            else:
-                messagebox.showerror("Error", "Failed to send configuration")
-        except ValueError:
-            messagebox.showerror("Error", "Invalid value!")
+            self.serial_connection.queue_command(channel, method, float(value))
+            self.command_status_label.config(text=f"Queued: {channel} {method} = {value}")
+        except ValueError as e:
+            self.notify(f"Invalid value: {e}", 'error')
+
+    def open_sequencer(self):
+        if self.sequencer_window and self.sequencer_window.winfo_exists():
+            self.sequencer_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("🎛️ Set-point Sequencer")
+        window.protocol("WM_DELETE_WINDOW", self.close_sequencer)
+        self.sequencer_window = window
+        self.sequence_file = None
+
+        self.sequence_channel = tk.StringVar(value=CHANNELS[0])
+        self.sequence_method = tk.StringVar(value='I')
+        self.sequence_profile = tk.StringVar(value='Ramp')
+        ttk.Label(window, text="Channel:").grid(row=0, column=0, padx=5, pady=5)
+        ttk.Combobox(window, values=CHANNELS, textvariable=self.sequence_channel,
+                     state="readonly", width=5).grid(row=0, column=1, padx=5)
+        ttk.Label(window, text="Method:").grid(row=0, column=2)
+        ttk.Combobox(window, values=['R', 'I', 'P'], textvariable=self.sequence_method,
+                     state="readonly", width=5).grid(row=0, column=3, padx=5)
+        ttk.Label(window, text="Profile:").grid(row=0, column=4)
+        profile_combo = ttk.Combobox(window, values=list(self.SEQUENCE_PROFILES) + ['CSV'],
+                                     textvariable=self.sequence_profile, state="readonly", width=10)
+        profile_combo.grid(row=0, column=5, padx=5)
+        profile_combo.bind("<<ComboboxSelected>>", lambda event: self.build_sequence_params())
+
+        self.sequence_params_frame = ttk.Frame(window)
+        self.sequence_params_frame.grid(row=1, column=0, columnspan=6, sticky='w', padx=5, pady=5)
+        self.build_sequence_params()
+
+        self.sequence_start_button = ttk.Button(window, text="▶️ Start", command=self.start_sequence)
+        self.sequence_start_button.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky='w')
+        ttk.Button(window, text="⏹️ Stop", command=self.stop_sequence).grid(row=2, column=2, columnspan=2)
+        self.sequence_status_label = ttk.Label(window, text="")
+        self.sequence_status_label.grid(row=3, column=0, columnspan=6, sticky='w', padx=5, pady=5)
+
+    def build_sequence_params(self):
+        for widget in self.sequence_params_frame.winfo_children():
+            widget.destroy()
+        self.sequence_entries = {}
+        profile = self.sequence_profile.get()
+        if profile == 'CSV':
+            ttk.Button(self.sequence_params_frame, text="📂 Load CSV",
+                       command=self.load_sequence_file).grid(row=0, column=0, padx=2)
+            self.sequence_file_label = ttk.Label(
+                self.sequence_params_frame,
+                text=os.path.basename(self.sequence_file) if self.sequence_file else "No file"
+            )
+            self.sequence_file_label.grid(row=0, column=1, padx=5)
+            return
+        for i, (label, default) in enumerate(self.SEQUENCE_PROFILES[profile]):
+            ttk.Label(self.sequence_params_frame, text=f"{label}:").grid(row=0, column=2 * i, padx=2)
+            entry = ttk.Entry(self.sequence_params_frame, width=8)
+            entry.insert(0, str(default))
+            entry.grid(row=0, column=2 * i + 1, padx=2)
+            self.sequence_entries[label] = entry
+
+    def load_sequence_file(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Select set-point profile"
+        )
+        if file_path:
+            self.sequence_file = file_path
+            self.sequence_file_label.config(text=os.path.basename(file_path))
+
+    def build_sequence_events(self):
+        channel = self.sequence_channel.get()
+        method = self.sequence_method.get()
+        profile = self.sequence_profile.get()
+        if profile == 'CSV':
+            if not self.sequence_file:
+                raise ValueError("Load a profile CSV first")
+            return load_profile_csv(self.sequence_file, channel, method)
+        params = [float(self.sequence_entries[label].get()) for label, _ in self.SEQUENCE_PROFILES[profile]]
+        points = {
+            'Ramp': ramp_profile,
+            'Staircase': staircase_profile,
+            'Sine': sine_profile
+        }[profile](*params)
+        return [(t, channel, method, value) for t, value in points]
+
+    def start_sequence(self):
+        if not self.serial_connection:
+            self.notify("Connect to a serial port first!", 'warning')
+            return
+        if self.sequencer and self.sequencer.running:
+            return
+        try:
+            events = self.build_sequence_events()
+            self.sequencer = SetpointSequencer(self.serial_connection, events)
+        except (OSError, ValueError) as e:
+            self.notify(f"Invalid profile: {e}", 'error')
+            return
+        if not events:
+            self.notify("Profile has no set-points!", 'warning')
+            return
+        self.sequencer.start()
+        self.update_sequencer_status()
+
+    def stop_sequence(self):
+        if self.sequencer:
+            self.sequencer.stop()
+
+    def update_sequencer_status(self):
+        if not self.sequencer or not self.sequencer_window or not self.sequencer_window.winfo_exists():
+            return
+        stats = self.sequencer.stats()
+        state = "running" if self.sequencer.running else "done"
+        elapsed = min(stats['elapsed'], self.sequencer.duration) if self.sequencer.running else self.sequencer.duration
+        self.sequence_status_label.config(
+            text=(f"{state}: {stats['sent']}/{stats['total']} set-points, "
+                  f"{elapsed:.1f} s / {self.sequencer.duration:.1f} s | "
+                  f"late mean {stats['late_mean_ms']:.2f} ms, max {stats['late_max_ms']:.2f} ms")
+        )
+        if self.sequencer.running:
+            self.sequencer_window.after(200, self.update_sequencer_status)
+
+    def close_sequencer(self):
+        self.stop_sequence()
+        if self.sequencer_window:
+            self.sequencer_window.destroy()
+            self.sequencer_window = None
+
+    def notify(self, message, level='info'):
+        # Non-blocking replacement for message boxes: status bar text only.
+        stamp = datetime.now().strftime("%H:%M:%S")
+        self.status_label.config(text=f"[{stamp}] {message}", foreground=self.NOTIFY_COLORS[level])
+
+    def show_alarm(self, event):
+        if event['active']:
+            self.notify(f"🚨 {event['message']}", 'error')
+            self.show_toast(event['message'])
+        else:
+            self.notify(f"✅ {event['key']} cleared")
+        alarms = self.serial_connection.alarms if self.serial_connection else None
+        if alarms:
+            self.alarm_button.config(text=f"🚨 Alarms ({len(alarms.history)})")
+        if self.alarm_window and self.alarm_window.winfo_exists():
+            self.add_alarm_row(event)
+
+    def show_toast(self, message):
+        # Borderless, non-grabbing popup in the corner of the main window;
+        # a newer alarm replaces the current toast.
+        if self.toast is None or not self.toast.winfo_exists():
+            self.toast = tk.Toplevel(self.root)
+            self.toast.overrideredirect(True)
+            self.toast.attributes('-topmost', True)
+            self.toast_label = ttk.Label(self.toast, padding=10, foreground='red', wraplength=300)
+            self.toast_label.pack()
+            self.toast.bind("<Button-1>", lambda event: self.hide_toast())
+        self.toast_label.config(text=f"🚨 {message}")
+        self.toast.update_idletasks()
+        x = self.root.winfo_rootx() + self.root.winfo_width() - self.toast.winfo_reqwidth() - 20
+        y = self.root.winfo_rooty() + self.root.winfo_height() - self.toast.winfo_reqheight() - 40
+        self.toast.geometry(f"+{x}+{y}")
+        if self.toast_job:
+            self.root.after_cancel(self.toast_job)
+        self.toast_job = self.root.after(self.TOAST_MS, self.hide_toast)
+
+    def hide_toast(self):
+        self.toast_job = None
+        if self.toast is not None:
+            self.toast.destroy()
+            self.toast = None
+
+    def open_alarm_log(self):
+        if self.alarm_window and self.alarm_window.winfo_exists():
+            self.alarm_window.lift()
+            return
+        self.alarm_window = tk.Toplevel(self.root)
+        self.alarm_window.title("🚨 Alarm Log")
+        columns = ('Time', 'Alarm', 'State', 'Count', 'Message')
+        self.alarm_table = ttk.Treeview(self.alarm_window, columns=columns, show='headings', height=15)
+        for column, width in zip(columns, (160, 140, 70, 60, 380)):
+            self.alarm_table.heading(column, text=column)
+            self.alarm_table.column(column, width=width, anchor='w')
+        self.alarm_table.pack(fill=tk.BOTH, expand=True)
+        self.alarm_rows = []
+        if self.serial_connection:
+            for event in self.serial_connection.alarms.history:
+                self.add_alarm_row(event)
+        self.refresh_alarm_counts()
+
+    def add_alarm_row(self, event):
+        item = self.alarm_table.insert('', 0, values=(
+            event['wall'].strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            event['key'],
+            "RAISED" if event['active'] else "CLEARED",
+            event['count'],
+            event['message']
+        ))
+        self.alarm_rows.append((item, event))
+
+    def refresh_alarm_counts(self):
+        # Deduplicated repeats bump the count of an event already listed.
+        if not self.alarm_window or not self.alarm_window.winfo_exists():
+            return
+        for item, event in self.alarm_rows:
+            self.alarm_table.set(item, 'Count', event['count'])
+        self.alarm_window.after(500, self.refresh_alarm_counts)
+
+    def update_command_status(self):
+        stats = self.serial_connection.command_stats()
+        last = stats['last']
+        if last is None:
+            return
+        channel, method, value, status, rtt = last
+        result = f"ack in {rtt * 1000:.0f} ms" if status == 'ack' else status
+        mean = f" | mean RTT {stats['rtt_mean_ms']:.0f} ms" if stats['rtt_mean_ms'] is not None else ""
+        self.command_status_label.config(
+            text=f"Last: {channel} {method} = {value:g} → {result}{mean} | pending {stats['pending']}"
+        )
     
     def toggle_channel_config(self, selected_channel):
         for ch_name in self.channel_vars:
@@ -620,35 +2655,21 @@ class AdvancedSerialMonitor:
                 self.metric_checkbuttons[ch_name][metric].configure(state=state)
     
     def start_plotting(self):
-        interval = self.plot_settings['update_interval'].get()
-        
-        if self.plot_windows:
-            first_channel = list(self.plot_windows.keys())[0]
-            fig = self.plot_windows[first_channel]['figure']
-            self.schedule_memory_cleanup()
-            
-            self.anim = animation.FuncAnimation(
-                fig, 
-                self.update_plot, 
-                interval=interval,
-                cache_frame_data=False  
-            )
-            
-            for channel_data in self.plot_windows.values():
-                channel_data['canvas'].draw()
+        load_plotting()
+        self.stop_animation()
+
         for channel_data in list(self.plot_windows.values()):
+            channel_data['renderer'].disconnect()
             plt.close(channel_data['figure'])
+            channel_data['window'].destroy()
         self.plot_windows.clear()
         
-        if self.anim is not None and self.anim.event_source is not None:
-            self.anim.event_source.stop()
-        
-        if not self.serial_connection:
-            messagebox.showwarning("Warning", "Connect to a serial port first!")
+        if not (self.serial_connection or self.replay):
+            self.notify("Connect to a serial port first!", 'warning')
             return
         
         if self.start_time is None:
-            self.start_time = time.time()
+            self.start_time = time.perf_counter()
         
         active_channels = []
         for ch, ch_var in self.channel_vars.items():
@@ -657,7 +2678,7 @@ class AdvancedSerialMonitor:
                     active_channels.append(ch)
         
         if not active_channels:
-            messagebox.showwarning("Warning", "Select at least one channel and metric!")
+            self.notify("Select at least one channel and metric!", 'warning')
             return
         
         for channel in active_channels:
@@ -705,6 +2726,10 @@ class AdvancedSerialMonitor:
                 
 
                 ax.grid(self.plot_settings['grid_enabled'].get())
+
+                # Fixed y-range (1% margin) set once instead of every frame;
+                # Auto Scale replaces it once data arrives.
+                self.set_fixed_ylim(ax, metric_key)
             
 
             fig.tight_layout(pad=3.0)
@@ -720,16 +2745,7 @@ class AdvancedSerialMonitor:
             
 
             plot_window.protocol("WM_DELETE_WINDOW", lambda w=plot_window, f=fig: self.on_plot_window_close(w, f))
-            
-
-            for metric in active_metrics:
-                metric_key = self.metric_keys[metric]
-                
-                if metric_key not in self.data_buffer[channel]:
-                    self.data_buffer[channel][metric_key] = {
-                        'x': [],
-                        'y': []
-                    }
+            plot_window.bind("<Map>", lambda event, ch=channel: self.on_plot_window_map(ch))
             
 
             self.plot_windows[channel] = {
@@ -737,7 +2753,8 @@ class AdvancedSerialMonitor:
                 'figure': fig,
                 'axes': axes,
                 'lines': lines,
-                'canvas': canvas
+                'canvas': canvas,
+                'renderer': BlitRenderer(fig, canvas, lines.values())
             }
             
 
@@ -747,141 +2764,104 @@ class AdvancedSerialMonitor:
         self.pause_button.config(state="normal")
         self.resume_button.config(state="disabled")
         self.is_plotting_paused = False
-        self.buffered_data = []
 
         self.start_animation()
 
-    def schedule_memory_cleanup(self):
-        self.root.after(self.cleanup_interval, self.perform_memory_cleanup)
-    
-    def perform_memory_cleanup(self):
+    def start_animation(self):
+        # One render clock on the Tk loop drives every plot window, so
+        # opening or closing a window never stops the others.
+        for channel_data in self.plot_windows.values():
+            channel_data['renderer'].invalidate()
+
+        if self.render_job is None and self.plot_windows:
+            self.frame_rate.reset()
+            self.render_job = self.root.after(0, self.render_tick)
+
+    def stop_animation(self):
+        if self.render_job is not None:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+
+    def render_tick(self):
+        self.render_job = None
+        if not self.plot_windows or self.is_plotting_paused:
+            return
+        tick_start = time.perf_counter()
         try:
-            active_channels = [ch for ch, var in self.channel_vars.items() if var.get()]
-            
-            for channel in list(self.data_buffer.keys()):
-                if channel not in active_channels:
-                    self.data_buffer[channel] = {}
-            
-
-            for channel in active_channels:
-                for metric_key in list(self.data_buffer.get(channel, {}).keys()):
-                    buffer = self.data_buffer[channel][metric_key]
-                    if len(buffer.get('x', [])) > self.MAX_POINTS:
-                        buffer['x'] = buffer['x'][-self.MAX_POINTS//2:]
-                        buffer['y'] = buffer['y'][-self.MAX_POINTS//2:]
-        
-            gc.collect()
-            
-            if self.plot_settings['auto_scale'].get():
-                for channel_data in self.plot_windows.values():
-                    for ax in channel_data['axes'].values():
-                        ax.relim()
-                        ax.autoscale_view()
-            
-
-            self.schedule_memory_cleanup()
-            
+            self.update_plot()
         except Exception as e:
-            print(f"Error during memory cleanup: {e}")
-            self.schedule_memory_cleanup()
-    def start_animation(self):
-        interval = self.plot_settings['update_interval'].get()
-        
+            print(f"Error updating plot: {e}")
+        self.frame_rate.record(tick_start, time.perf_counter() - tick_start)
 
-        if self.plot_windows:
-            first_channel = list(self.plot_windows.keys())[0]
-            fig = self.plot_windows[first_channel]['figure']
-            
-
-            self.anim = animation.FuncAnimation(
-                fig, 
-                self.update_plot, 
-                interval=interval,
-                cache_frame_data=False  
+        try:
+            self.frame_rate.set_limits(self.plot_settings['min_fps'].get(), self.plot_settings['max_fps'].get())
+        except (tk.TclError, ValueError):
+            pass
+        if tick_start - self.last_stats_update >= self.STATS_INTERVAL:
+            self.last_stats_update = tick_start
+            stats = self.frame_rate.stats()
+            self.render_stats_label.config(
+                text=f"FPS: {stats['fps']:.1f} | Draw: {stats['draw_ms']:.1f} ms (max {stats['draw_max_ms']:.1f})"
             )
-            
-
-            for channel_data in self.plot_windows.values():
-                channel_data['canvas'].draw()
+        self.render_job = self.root.after(self.frame_rate.next_delay_ms(), self.render_tick)
     
-    def update_plot(self, frame):
-        if not self.serial_connection:
+    def update_plot(self, frame=None):
+        if not (self.serial_connection or self.replay) or self.is_plotting_paused:
             return []
 
-        data = {}
-        if self.serial_connection.ser.in_waiting > 0:
-            data = self.serial_connection.get_data()
-
-        if not data or not data.get('time'):
-            return []
-
-        if self.start_time is None:
-            self.start_time = data['time']
-
-        relative_time = data['time'] - self.start_time
-
-        if self.logger.is_logging:
-            for ch in ["CH1", "CH2", "CH3"]:
-                if ch in data:
-                    for key in ['V', 'I', 'R', 'P']:
-                        if self.channel_vars[ch].get():
-                            metric_name = next((m for m, k in self.metric_keys.items() if k == key), None)
-                            if metric_name and self.plot_configurations[ch][metric_name].get():
-                                self.logger.log_data_point(relative_time, ch, key, data[ch][key])
-
-        if self.is_plotting_paused:
-            self.buffered_data.append((relative_time, data))
+        updated_lines = []
+        latest = self.history.latest_time()
+        if latest is None:
             return []
 
-        if self.buffered_data:
-            for t, d in self.buffered_data:
-                self.update_data_buffers(t, d)
-            self.buffered_data = []
-
-        self.update_data_buffers(relative_time, data)
-
-        updated_lines = []
+        follow = self.plot_settings['follow_live'].get()
+        try:
+            window = max(float(self.plot_settings['window_seconds'].get()), 0.1)
+        except (tk.TclError, ValueError):
+            window = 20.0
+        queries = {}
+        now = time.perf_counter()
+        autoscale = (self.plot_settings['auto_scale'].get()
+                     and now - self.last_autoscale >= self.AUTOSCALE_INTERVAL)
+        if autoscale:
+            self.last_autoscale = now
 
         for channel, win in self.plot_windows.items():
-            for metric_key, line in win['lines'].items():
-                buf = self.data_buffer.get(channel, {}).get(metric_key, {'x': [], 'y': []})
-                x_data, y_data = buf['x'], buf['y']
-                line.set_data(x_data, y_data)
-                updated_lines.append(line)
+            # Minimized or hidden windows cost nothing until they are shown.
+            if not win['window'].winfo_viewable():
+                continue
+            updated_lines += render_window(
+                self.history, win['axes'], win['lines'], win['renderer'], CHANNELS.index(channel),
+                latest, window, follow, self.SCROLL_HEADROOM, autoscale, queries
+            )
 
-                ax = win['axes'][metric_key]
-                ax.relim()
-                ax.autoscale_view()
+        return updated_lines
 
+    def set_fixed_ylim(self, ax, metric_key):
+        y_min, y_max = self.metric_y_ranges[metric_key]
+        margin = (y_max - y_min) * 0.01
+        ax.set_ylim(y_min - margin, y_max + margin)
 
-                if metric_key == 'I':
-                    ax.set_ylim(-10, 1010)
-                elif metric_key in ['V', 'P']:
-                    ax.set_ylim(-300, 30300)
-                elif metric_key == 'R':
-                    ax.set_ylim(-100, 10100)
+    def on_auto_scale_toggled(self):
+        # Switching on re-fits on the next tick; switching off restores the
+        # fixed ranges.
+        self.last_autoscale = 0.0
+        if self.plot_settings['auto_scale'].get():
+            return
+        for win in self.plot_windows.values():
+            for metric_key, ax in win['axes'].items():
+                self.set_fixed_ylim(ax, metric_key)
+            win['renderer'].invalidate()
 
-        return updated_lines
+    def update_data_buffers(self, relative_times, values):
+        self.history.append(relative_times, values)
+        self.stats.append(relative_times, values)
+
+    def on_plot_window_map(self, channel):
+        win = self.plot_windows.get(channel)
+        if win:
+            win['renderer'].invalidate()
 
-    def update_data_buffers(self, relative_time, data):
-        for channel, channel_data in list(self.plot_windows.items()):
-            if channel in data:
-                for metric_key in channel_data['lines'].keys():
-                    if metric_key in data[channel]:
-
-                        if channel not in self.data_buffer:
-                            self.data_buffer[channel] = {}
-                        
-                        if metric_key not in self.data_buffer[channel]:
-                            self.data_buffer[channel][metric_key] = {'x': [], 'y': []}
-                        
-                        buffer = self.data_buffer[channel][metric_key]
-                        buffer['x'].append(relative_time)
-                        buffer['y'].append(data[channel][metric_key])
-                        
-                        if len(buffer['x']) > self.MAX_POINTS:
-                            buffer['x'] = buffer['x'][-self.MAX_POINTS:]
-                            buffer['y'] = buffer['y'][-self.MAX_POINTS:]
     def on_plot_window_close(self, window, figure):
         plt.close(figure)
         window.destroy()
@@ -889,14 +2869,10 @@ class AdvancedSerialMonitor:
         for channel, data in list(self.plot_windows.items()):
             if data['window'] == window:
                 del self.plot_windows[channel]
-                if channel in self.data_buffer:
-                    self.data_buffer[channel] = {}  
                 break
 
-        if self.anim is not None and self.anim.event_source is not None:
-            self.anim.event_source.stop()
-
         if not self.plot_windows:
+            self.stop_animation()
             self.pause_button.config(state="disabled")
             self.resume_button.config(state="disabled")
 
@@ -905,6 +2881,14 @@ class AdvancedSerialMonitor:
         if self.logger.is_logging:
             self.logger.close()
 
+        self.stop_sequence()
+        self.hide_toast()
+        self.stop_acquisition()
+        self.stop_telemetry_server()
+        if self.replay:
+            self.replay.close()
+        if self.dashboard:
+            self.dashboard.close()
         if self.serial_connection:
             try:
                 self.serial_connection.close()
@@ -913,8 +2897,7 @@ class AdvancedSerialMonitor:
                 print(f"Error closing serial port: {e}")
         
 
-        if hasattr(self, 'anim') and self.anim and self.anim.event_source is not None:
-            self.anim.event_source.stop()
+        self.stop_animation()
         
         for channel_data in list(self.plot_windows.values()):
             try:
@@ -924,7 +2907,7 @@ class AdvancedSerialMonitor:
                 print(f"Error closing plot window: {e}")
         
 
-        self.data_buffer.clear()
+        self.history.clear()
         self.plot_windows.clear()
         
         import gc
@@ -932,7 +2915,836 @@ class AdvancedSerialMonitor:
         
         self.root.destroy()
 
-def main():
+class MultiDeviceDashboard:
+    """Shared dashboard for many boards, one DeviceSession per port.
+
+    Each session acquires on its own thread, so the Tk thread only reads
+    snapshots for the table and history queries for the overlay plot.
+    """
+
+    REFRESH_INTERVAL = 500
+    PLOT_INTERVAL = 200
+    COLUMNS = ['Port', 'Frames', 'Rate (fps)'] + [
+        f"{ch} {key}" for ch in CHANNELS for key in ('V', 'I')
+    ] + ['Flags', 'Dropped (B)']
+
+    def __init__(self, app):
+        self.app = app
+        self.root = app.root
+        self.sessions = {}
+        self.start_time = None
+        self.last_counts = {}
+        self.reported_errors = set()
+        self.last_refresh = time.perf_counter()
+        self.plot = None
+        self.plot_job = None
+
+        self.window = tk.Toplevel(self.root)
+        self.window.title("🧰 Multi-Device Dashboard")
+        self.window.geometry("1100x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        port_frame = ttk.LabelFrame(self.window, text=" 🔌 Ports ", padding=(10, 5))
+        port_frame.grid(row=0, column=0, padx=10, pady=5, sticky="ns")
+        self.port_list = tk.Listbox(port_frame, selectmode=tk.MULTIPLE, height=12, exportselection=False)
+        self.port_list.grid(row=0, column=0, columnspan=2, sticky="ns")
+        ttk.Button(port_frame, text="🔍 Refresh", command=self.refresh_ports).grid(row=1, column=0, sticky='ew')
+        ttk.Button(port_frame, text="🚀 Connect", command=self.connect_selected).grid(row=1, column=1, sticky='ew')
+        ttk.Button(port_frame, text="🔌 Disconnect All", command=self.disconnect_all).grid(
+            row=2, column=0, columnspan=2, sticky='ew')
+        self.log_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(port_frame, text="📝 Log each port", variable=self.log_var).grid(
+            row=3, column=0, columnspan=2, sticky='w')
+
+        table_frame = ttk.LabelFrame(self.window, text=" 📋 Devices ", padding=(10, 5))
+        table_frame.grid(row=0, column=1, padx=10, pady=5, sticky="nsew")
+        self.table = ttk.Treeview(table_frame, columns=self.COLUMNS, show='headings', height=16)
+        for column in self.COLUMNS:
+            self.table.heading(column, text=column)
+            self.table.column(column, width=80, anchor='e')
+        self.table.column('Port', width=110, anchor='w')
+        self.table.pack(fill=tk.BOTH, expand=True)
+
+        plot_frame = ttk.Frame(self.window)
+        plot_frame.grid(row=1, column=1, padx=10, pady=5, sticky="w")
+        self.plot_channel = tk.StringVar(value=CHANNELS[0])
+        self.plot_metric = tk.StringVar(value=app.metrics[0])
+        ttk.Combobox(plot_frame, values=CHANNELS, textvariable=self.plot_channel,
+                     state="readonly", width=5).grid(row=0, column=0, padx=2)
+        ttk.Combobox(plot_frame, values=app.metrics, textvariable=self.plot_metric,
+                     state="readonly", width=10).grid(row=0, column=1, padx=2)
+        ttk.Button(plot_frame, text="📈 Plot All Devices", command=self.open_plot).grid(row=0, column=2, padx=2)
+
+        self.window.columnconfigure(1, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        self.refresh_ports()
+        self.window.after(self.REFRESH_INTERVAL, self.refresh)
+
+    def refresh_ports(self):
+        self.port_list.delete(0, tk.END)
+        for port in self.app.get_available_ports():
+            self.port_list.insert(tk.END, port)
+
+    def connect_selected(self):
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        errors = []
+        for index in self.port_list.curselection():
+            port = self.port_list.get(index)
+            if port in self.sessions:
+                continue
+            try:
+                session = DeviceSession(port, self.start_time)
+                session.start(log=self.log_var.get())
+            except Exception as e:
+                errors.append(f"{port}: {e}")
+                continue
+            self.sessions[port] = session
+            self.last_counts[port] = 0
+            self.table.insert('', tk.END, iid=port, values=[port] + [''] * (len(self.COLUMNS) - 1))
+        if errors:
+            self.app.notify("Connection error: " + "; ".join(errors), 'error')
+
+    def disconnect_all(self):
+        for port, session in list(self.sessions.items()):
+            session.stop()
+            self.table.delete(port)
+        self.sessions.clear()
+        self.last_counts.clear()
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        now = time.perf_counter()
+        elapsed = max(now - self.last_refresh, 1e-6)
+        self.last_refresh = now
+        for port, session in self.sessions.items():
+            snap = session.snapshot()
+            rate = (snap['frames'] - self.last_counts.get(port, 0)) / elapsed
+            self.last_counts[port] = snap['frames']
+            row = [port, snap['frames'], f"{rate:.0f}"]
+            if snap['values'] is None:
+                row += [''] * (2 * len(CHANNELS))
+            else:
+                for c in range(len(CHANNELS)):
+                    row += [f"{snap['values'][c, 0]:.0f}", f"{snap['values'][c, 1]:.0f}"]
+            row += [f"0x{snap['flags']:02X}", snap['dropped_bytes']]
+            if snap['error']:
+                row[2] = "lost"
+                if port not in self.reported_errors:
+                    self.reported_errors.add(port)
+                    self.app.notify(f"{port}: serial port lost: {snap['error']}", 'error')
+            self.table.item(port, values=row)
+            for event in session.handler.alarms.drain():
+                if event['active']:
+                    self.app.notify(f"🚨 {port}: {event['message']}", 'error')
+                    self.app.show_toast(f"{port}: {event['message']}")
+        self.window.after(self.REFRESH_INTERVAL, self.refresh)
+
+    def open_plot(self):
+        if not self.sessions:
+            self.app.notify("Connect at least one port first!", 'warning')
+            return
+        load_plotting()
+        self.close_plot()
+        channel = self.plot_channel.get()
+        metric = self.plot_metric.get()
+        metric_key = self.app.metric_keys[metric]
+
+        plot_window = tk.Toplevel(self.window)
+        plot_window.title(f"{channel} {metric} - all devices")
+        plot_window.geometry("900x500")
+        plot_window.protocol("WM_DELETE_WINDOW", self.close_plot)
+
+        fig = plt.figure(figsize=(10, 5), dpi=100)
+        ax = fig.add_subplot(1, 1, 1)
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel(self.app.metric_properties[metric]['ylabel'])
+        ax.grid(self.app.plot_settings['grid_enabled'].get())
+        y_min, y_max = self.app.metric_y_ranges[metric_key]
+        margin = (y_max - y_min) * 0.01
+        ax.set_ylim(y_min - margin, y_max + margin)
+        lines = {port: ax.plot([], [], label=port)[0] for port in self.sessions}
+        ax.legend(loc='upper left')
+
+        canvas = FigureCanvasTkAgg(fig, master=plot_window)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        NavigationToolbar2Tk(canvas, plot_window).update()
+
+        self.plot = {
+            'window': plot_window,
+            'figure': fig,
+            'axes': ax,
+            'lines': lines,
+            'index': (CHANNELS.index(channel), METRIC_KEYS.index(metric_key)),
+            'renderer': BlitRenderer(fig, canvas, lines.values())
+        }
+        self.plot_job = self.window.after(0, self.update_plot)
+
+    def update_plot(self):
+        self.plot_job = None
+        if not self.plot:
+            return
+        ax = self.plot['axes']
+        c, m = self.plot['index']
+        latest = max((t for t in (s.latest_time() for s in self.sessions.values()) if t is not None),
+                     default=None)
+        if latest is not None:
+            try:
+                window = max(float(self.app.plot_settings['window_seconds'].get()), 0.1)
+            except (tk.TclError, ValueError):
+                window = 20.0
+            t_start, t_end = ax.get_xlim()
+            if self.app.plot_settings['follow_live'].get() and (
+                    latest > t_end or abs((t_end - t_start) - window) > 1e-9):
+                t_end = latest + window * self.app.SCROLL_HEADROOM
+                t_start = t_end - window
+                ax.set_xlim(t_start, t_end)
+                self.plot['renderer'].invalidate()
+
+            max_points = 2 * max(int(ax.get_window_extent().width), 100)
+            for port, line in self.plot['lines'].items():
+                session = self.sessions.get(port)
+                if session is None:
+                    line.set_data([], [])
+                    continue
+                line.set_data(*envelope_xy(*session.query(t_start, t_end, max_points), c, m))
+            self.plot['renderer'].update()
+        self.plot_job = self.window.after(self.PLOT_INTERVAL, self.update_plot)
+
+    def close_plot(self):
+        if self.plot_job is not None:
+            self.window.after_cancel(self.plot_job)
+            self.plot_job = None
+        if self.plot:
+            self.plot['renderer'].disconnect()
+            plt.close(self.plot['figure'])
+            self.plot['window'].destroy()
+            self.plot = None
+
+    def close(self):
+        self.close_plot()
+        self.disconnect_all()
+        if self.window.winfo_exists():
+            self.window.destroy()
+
+
+class AsyncSerialTransport:
+    """asyncio transport for one serial port.
+
+    On POSIX the port's file descriptor is registered with the event loop's
+    selector, so bytes reach the parser as soon as they arrive, with no
+    polling interval and no thread. Elsewhere (no selectable fd, e.g.
+    Windows) blocking reads run in the loop's default executor.
+
+    The parser is pluggable: any object with feed(data, arrival_ns) that
+    returns a batch dict (or {} when no frame completed), by default an
+    offline SerialCommunicationHandler. Decoded batches are consumed with
+    `async for batch in transport`.
+    """
+
+    def __init__(self, port=None, ser=None, parser=None, baudrate=115200, queue_size=1000):
+        self.port = port
+        self.ser = ser
+        self.baudrate = baudrate
+        self.parser = parser if parser is not None else SerialCommunicationHandler(baudrate=baudrate)
+        self.queue_size = queue_size
+        self.dropped_batches = 0
+        self.loop = None
+        self._queue = None
+        self._reader_task = None
+        self._fd = None
+        self.closed = False
+
+    async def open(self):
+        import asyncio  # deferred: only the async transport needs it
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.ser is None:
+            self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+        fd = None
+        if os.name == 'posix':
+            try:
+                fd = self.ser.fileno()
+            except (AttributeError, OSError, NotImplementedError):
+                fd = None
+        if fd is not None:
+            self.ser.timeout = 0
+            self._fd = fd
+            self.loop.add_reader(fd, self._on_readable)
+        else:
+            self._reader_task = self.loop.create_task(self._executor_reader())
+        return self
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def _on_readable(self):
+        try:
+            data = self.ser.read(max(1, self.ser.in_waiting))
+        except Exception as e:
+            print(f"Error receiving data: {e}")
+            self.close()
+            return
+        if data:
+            self._deliver(data, time.perf_counter_ns())
+
+    async def _executor_reader(self):
+        timeout = self.ser.timeout
+        if timeout is None or timeout == 0:
+            self.ser.timeout = 0.05
+
+        def read():
+            return self.ser.read(max(1, self.ser.in_waiting))
+
+        while not self.closed:
+            try:
+                data = await self.loop.run_in_executor(None, read)
+            except Exception as e:
+                print(f"Error receiving data: {e}")
+                self.close()
+                return
+            if data:
+                self._deliver(data, time.perf_counter_ns())
+
+    def _deliver(self, data, arrival_ns):
+        batch = self.parser.feed(data, arrival_ns)
+        if not batch:
+            return
+        if self._queue.full():
+            # Same policy as the threaded reader: drop the oldest batch.
+            self._queue.get_nowait()
+            self.dropped_batches += 1
+        self._queue.put_nowait(batch)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+        batch = await self._queue.get()
+        if batch is None:
+            raise StopAsyncIteration
+        return batch
+
+    async def write(self, data):
+        if self._fd is not None:
+            return self.ser.write(data)
+        return await self.loop.run_in_executor(None, self.ser.write, data)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self.ser is not None and self.ser.is_open:
+            self.ser.close()
+        if self._queue is not None:
+            # Wake any consumer waiting in __anext__.
+            if self._queue.full():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+
+class TelemetryServer:
+    """Fans decoded batches out to any number of local subscribers.
+
+    Register publish() in SerialCommunicationHandler.subscribers. publish()
+    only queues the batch; a fan-out thread encodes it once and hands it to
+    every client's bounded queue, and a sender thread per client writes to
+    its socket. Whoever falls behind loses the oldest data (counted in
+    'dropped'), so acquisition never waits on encoding or a socket.
+
+    fmt 'ndjson' sends one JSON object per frame with the batch keys;
+    fmt 'binary' sends a binary log header followed by LOG_RECORD_DTYPE
+    records, the same bytes as a .bin log. Times are Unix epoch seconds.
+    With websocket=True clients connect with a WebSocket handshake and
+    each chunk is one message (text for ndjson, binary otherwise).
+    """
+
+    WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+    def __init__(self, host='127.0.0.1', port=8765, fmt='ndjson', websocket=False,
+                 client_queue_size=256, batch_queue_size=1000):
+        if fmt not in ('ndjson', 'binary'):
+            raise ValueError(f"Unknown telemetry format: {fmt}")
+        self.host = host
+        self.port = port
+        self.fmt = fmt
+        self.websocket = websocket
+        self.client_queue_size = client_queue_size
+        # perf_counter -> Unix time, fixed when the server starts.
+        self.epoch_offset = time.time() - time.perf_counter()
+        self.clients = []
+        self.batches_published = 0
+        self.batches_dropped = 0
+        self._batches = queue.Queue(maxsize=batch_queue_size)
+        self._lock = threading.Lock()
+        self._socket = None
+        self._accept_thread = None
+        self._fanout_thread = None
+        self.running = False
+
+    @property
+    def url(self):
+        return f"{'ws' if self.websocket else 'tcp'}://{self.host}:{self.port}"
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen()
+        self._socket.settimeout(0.5)
+        self.port = self._socket.getsockname()[1]
+        self.running = True
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+        self._fanout_thread = threading.Thread(target=self._fanout_loop, daemon=True)
+        self._fanout_thread.start()
+        return self.url
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, addr = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._serve_client, args=(conn, addr), daemon=True).start()
+
+    def _handshake(self, conn):
+        conn.settimeout(5.0)
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = conn.recv(1024)
+            if not chunk or len(request) > 8192:
+                raise OSError("Incomplete WebSocket handshake")
+            request += chunk
+        key = None
+        for line in request.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"sec-websocket-key":
+                key = value.strip()
+        if key is None:
+            conn.sendall(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+            raise OSError("Missing Sec-WebSocket-Key")
+        accept = base64.b64encode(hashlib.sha1(key + self.WS_GUID).digest())
+        conn.sendall(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        conn.settimeout(None)
+
+    def _ws_frame(self, payload):
+        # Server frames are unmasked; FIN + text/binary opcode.
+        opcode = 0x1 if self.fmt == 'ndjson' else 0x2
+        n = len(payload)
+        if n < 126:
+            header = bytes([0x80 | opcode, n])
+        elif n < 65536:
+            header = bytes([0x80 | opcode, 126]) + struct.pack('>H', n)
+        else:
+            header = bytes([0x80 | opcode, 127]) + struct.pack('>Q', n)
+        return header + payload
+
+    def _serve_client(self, conn, addr):
+        client = {'addr': addr, 'queue': queue.Queue(maxsize=self.client_queue_size), 'dropped': 0, 'sent': 0}
+        try:
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.websocket:
+                self._handshake(conn)
+            if self.fmt == 'binary':
+                header = log_header(time_base='unix')
+                conn.sendall(self._ws_frame(header) if self.websocket else header)
+            with self._lock:
+                self.clients.append(client)
+            while self.running:
+                try:
+                    chunk = client['queue'].get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    break
+                conn.sendall(self._ws_frame(chunk) if self.websocket else chunk)
+                client['sent'] += 1
+        except OSError:
+            pass  # client went away
+        finally:
+            with self._lock:
+                if client in self.clients:
+                    self.clients.remove(client)
+            conn.close()
+
+    def encode(self, batch):
+        times = batch['time'] + self.epoch_offset
+        n = len(times)
+        setpoints = batch.get('setpoint')
+        if setpoints is None:
+            setpoints = np.full((n, len(CHANNELS)), np.nan)
+        modes = batch.get('mode')
+        if modes is None:
+            modes = np.zeros((n, len(CHANNELS)), dtype=np.uint8)
+        if self.fmt == 'binary':
+            return log_records(times, batch['values'], batch['G'], batch['flags'], setpoints, modes).tobytes()
+        rows = zip(
+            times.tolist(),
+            batch['values'].tolist(),
+            batch['G'].tolist(),
+            batch['flags'].tolist(),
+            np.where(np.isnan(setpoints), None, setpoints).tolist(),
+            modes.tolist()
+        )
+        return "".join(
+            json.dumps({"time": t, "values": v, "G": g, "flags": f, "setpoint": sp, "mode": md},
+                       separators=(',', ':')) + "\n"
+            for t, v, g, f, sp, md in rows
+        ).encode('utf-8')
+
+    @staticmethod
+    def _put_latest(q, item):
+        # Bounded put that evicts the oldest item; returns True if one was dropped.
+        dropped = False
+        if q.full():
+            try:
+                q.get_nowait()
+                dropped = True
+            except queue.Empty:
+                pass
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            dropped = True
+        return dropped
+
+    def publish(self, batch):
+        # Called on the acquisition thread: never blocks.
+        if not batch or not self.clients:
+            return
+        if self._put_latest(self._batches, batch):
+            self.batches_dropped += 1
+
+    def _fanout_loop(self):
+        while self.running:
+            try:
+                batch = self._batches.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            chunk = self.encode(batch)
+            self.batches_published += 1
+            with self._lock:
+                clients = list(self.clients)
+            for client in clients:
+                if self._put_latest(client['queue'], chunk):
+                    client['dropped'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'url': self.url,
+                'clients': len(self.clients),
+                'batches': self.batches_published,
+                'dropped': self.batches_dropped + sum(client['dropped'] for client in self.clients)
+            }
+
+    def stop(self):
+        self.running = False
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client['queue'].put_nowait(None)
+            except queue.Full:
+                pass
+        for thread in (self._accept_thread, self._fanout_thread):
+            if thread is not None:
+                thread.join(timeout=2)
+        self._accept_thread = self._fanout_thread = None
+
+
+def reparse_capture(capture_path, log_path=None):
+    """Run the frame decoder over a raw capture as fast as the disk allows."""
+    handler = SerialCommunicationHandler()
+    logger = None
+    if log_path:
+        logger = Logger()
+        success, msg = logger.start_logging(log_path)
+        if not success:
+            raise OSError(msg)
+
+    stats = {'chunks': 0, 'bytes': 0, 'frames': 0, 'flagged_frames': 0}
+    first_ns = None
+    started = time.perf_counter()
+    try:
+        for timestamp_ns, data in iter_raw_capture(capture_path):
+            if first_ns is None:
+                first_ns = timestamp_ns
+            stats['chunks'] += 1
+            stats['bytes'] += len(data)
+            batch = handler.feed(data, timestamp_ns)
+            if not batch:
+                continue
+            batch['time'] -= first_ns / 1e9
+            stats['frames'] += len(batch['values'])
+            stats['flagged_frames'] += int(np.count_nonzero(batch['flags']))
+            if logger:
+                logger.log_batch(batch['time'], batch)
+    finally:
+        if logger:
+            logger.close()
+
+    stats['discarded_bytes'] = stats['bytes'] - stats['frames'] * FRAME_SIZE - len(handler.buffer)
+    stats['elapsed_s'] = time.perf_counter() - started
+    return stats
+
+
+def parse_setpoint(text):
+    # "CH1:I=250" -> ('CH1', 'I', 250.0), for --set
+    try:
+        target, value = text.split('=')
+        channel, method = target.split(':')
+        channel, method, value = channel.upper(), method.upper(), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected CHn:METHOD=VALUE, got {text!r}")
+    if channel not in CHANNELS or method not in SETPOINT_MODES:
+        raise argparse.ArgumentTypeError(f"unknown channel or method in {text!r}")
+    return channel, method, value
+
+
+def parse_step(text):
+    # "2.5:CH1:I=1200" -> (2.5, 'CH1', 'I', 1200.0), for simulate --step
+    try:
+        t, target = text.split(':', 1)
+        t = float(t)
+        if target.lower().startswith('flags='):
+            return t, None, 'flags', int(target.split('=', 1)[1], 0)
+        channel, value = target.split('=')
+        channel, key = channel.split(':')
+        channel, key, value = channel.upper(), key.upper(), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected T:CHn:V|I=VALUE or T:flags=BYTE, got {text!r}")
+    if channel not in CHANNELS or key not in ('V', 'I'):
+        raise argparse.ArgumentTypeError(f"unknown channel or key in {text!r}")
+    return t, channel, key, value
+
+
+def run_simulator(rate=1000.0, seed=0, noise=0.01, corrupt_rate=0.0, partial_rate=0.0,
+                  events=(), throttle=True, duration=None):
+    """Serve a VirtualDevice on a pty until `duration` elapses or Ctrl-C."""
+    device = VirtualDevice(rate, seed, noise, corrupt_rate, partial_rate, events, throttle=throttle)
+    stop_event = threading.Event()
+    path = serve_pty(device, stop_event)
+    print(f"Simulated device on {path} ({rate:g} frames/s); Ctrl-C to stop", flush=True)
+    try:
+        stop_event.wait(duration)
+    except KeyboardInterrupt:
+        pass
+    stop_event.set()
+    return {
+        'frames': device.frames_generated,
+        'commands': device.commands_received,
+        'flags': f"0x{device.flags | device.forced_flags:02X}"
+    }
+
+
+def stats_report(stats, frames, elapsed, dropped_bytes=0):
+    """JSON-friendly snapshot of a RunningStats for the headless monitor."""
+    report = {
+        'elapsed_s': round(elapsed, 3),
+        'frames': frames,
+        'fps': round(frames / elapsed, 1) if elapsed > 0 else 0.0,
+        'dropped_bytes': dropped_bytes,
+        'channels': {}
+    }
+    if not stats.count:
+        return report
+    charge, energy = stats.charge(), stats.energy()
+    for c, ch in enumerate(CHANNELS):
+        channel = {
+            key: {
+                'last': float(stats.last_values[c, m]),
+                'min': float(stats.min[c, m]),
+                'max': float(stats.max[c, m]),
+                'mean': float(stats.mean[c, m]),
+                'rms': float(stats.rms[c, m])
+            }
+            for m, key in enumerate(METRIC_KEYS)
+        }
+        channel['charge_mC'] = float(charge[c])
+        channel['energy_mJ'] = float(energy[c])
+        report['channels'][ch] = channel
+    return report
+
+
+def format_report(report):
+    line = f"{report['elapsed_s']:8.1f} s {report['frames']:>9,} frames {report['fps']:7.1f} fps"
+    for ch, channel in report['channels'].items():
+        line += (f" | {ch} V {channel['V']['last']:.0f} I {channel['I']['last']:.0f}"
+                 f" Q {channel['charge_mC']:.1f} mC E {channel['energy_mJ']:.1f} mJ")
+    return line
+
+
+def run_headless(port, baudrate=115200, duration=None, log_path=None, raw_path=None,
+                 setpoints=(), profile=None, report_interval=1.0, as_json=False, out=None,
+                 serve_port=None, serve_format='ndjson', websocket=False, alarm_log=None):
+    """Connect, optionally log/capture, serve and send set-points, and print
+    live statistics until `duration` elapses or Ctrl-C. Never touches the
+    GUI stack. Prints and returns the final report; it is not printed again
+    when it matches the last periodic line."""
+    out = out or sys.stdout
+    handler = SerialCommunicationHandler(port, baudrate=baudrate)
+    handler.alarms.log_path = alarm_log
+    logger = Logger()
+    sequencer = None
+    server = None
+    stats = RunningStats()
+    frames = 0
+    last_line = None
+    start = now = time.perf_counter()
+    try:
+        if log_path:
+            success, msg = logger.start_logging(log_path)
+            if not success:
+                raise OSError(msg)
+        if raw_path:
+            handler.start_raw_capture(raw_path)
+        if serve_port is not None:
+            server = TelemetryServer(port=serve_port, fmt=serve_format, websocket=websocket)
+            print(f"Streaming {serve_format} on {server.start()}", file=sys.stderr)
+            handler.subscribers.append(server.publish)
+        for channel, method, value in setpoints:
+            handler.queue_command(channel, method, value)
+        if profile:
+            sequencer = SetpointSequencer(handler, load_profile_csv(profile))
+
+        start = time.perf_counter()
+        next_report = start + report_interval
+        if sequencer:
+            sequencer.start()
+        now = start
+        while duration is None or now - start < duration:
+            batch = handler.get_data()
+            now = time.perf_counter()
+            if batch:
+                relative_times = batch['time'] - start
+                if logger.is_logging:
+                    logger.log_batch(relative_times, batch)
+                stats.append(relative_times, batch['values'])
+                frames += len(relative_times)
+            for event in handler.alarms.drain():
+                state = "RAISED" if event['active'] else "CLEARED"
+                print(f"[ALARM] {event['wall'].isoformat(timespec='milliseconds')} {state} "
+                      f"{event['key']}: {event['message']}", file=sys.stderr)
+            if now >= next_report:
+                next_report += report_interval
+                report = stats_report(stats, frames, now - start, handler.buffer.dropped_bytes)
+                last_line = json.dumps(report) if as_json else format_report(report)
+                print(last_line, file=out, flush=True)
+    except KeyboardInterrupt:
+        now = time.perf_counter()
+    finally:
+        if sequencer:
+            sequencer.stop()
+        if server:
+            server.stop()
+        handler.close()
+        logger.close()
+    report = stats_report(stats, frames, now - start, handler.buffer.dropped_bytes)
+    line = json.dumps(report) if as_json else format_report(report)
+    if line != last_line:
+        print(line, file=out, flush=True)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Advanced Serial Monitor Pro")
+    subparsers = parser.add_subparsers(dest='command')
+
+    reparse = subparsers.add_parser('reparse', help="decode a raw capture into a log and/or statistics")
+    reparse.add_argument('capture', help="raw capture file (.raw)")
+    reparse.add_argument('--log', help="write decoded frames to this log (.bin for binary, otherwise CSV)")
+
+    subparsers.add_parser('ports', help="list available serial ports")
+
+    simulate = subparsers.add_parser('simulate', help="serve a simulated board on a pseudo-terminal (POSIX)")
+    simulate.add_argument('--rate', type=float, default=1000.0, help="frames per second")
+    simulate.add_argument('--seed', type=int, default=0)
+    simulate.add_argument('--noise', type=float, default=0.01, help="relative standard deviation of V and I")
+    simulate.add_argument('--corrupt', type=float, default=0.0, help="probability of a garbled byte per frame")
+    simulate.add_argument('--partial', type=float, default=0.0, help="probability of a truncated frame")
+    simulate.add_argument('--step', dest='events', action='append', type=parse_step, default=[],
+                          metavar='T:CHn:V|I=VALUE', help="step change at T seconds, or T:flags=0x80 (repeatable)")
+    simulate.add_argument('--unthrottled', action='store_true', help="generate as fast as the reader consumes")
+    simulate.add_argument('--duration', type=float, help="stop after this many seconds")
+
+    run = subparsers.add_parser('run', help="headless acquisition: log, capture and print live statistics")
+    run.add_argument('port', help="serial port, e.g. /dev/ttyUSB0 or COM3")
+    run.add_argument('--baud', type=int, default=115200)
+    run.add_argument('--duration', type=float, help="stop after this many seconds (default: until Ctrl-C)")
+    run.add_argument('--log', help="log file (.bin for binary, otherwise CSV)")
+    run.add_argument('--raw', help="raw byte-stream capture file (.raw)")
+    run.add_argument('--set', dest='setpoints', action='append', type=parse_setpoint, default=[],
+                     metavar='CHn:METHOD=VALUE', help="send a set-point on connect, e.g. CH1:I=250 (repeatable)")
+    run.add_argument('--profile', help="set-point profile CSV (time,channel,method,value) to play")
+    run.add_argument('--interval', type=float, default=1.0, help="seconds between statistics lines")
+    run.add_argument('--json', action='store_true', help="print statistics as one JSON object per line")
+    run.add_argument('--serve', type=int, metavar='PORT', help="stream decoded frames to local clients on this TCP port")
+    run.add_argument('--serve-format', choices=['ndjson', 'binary'], default='ndjson')
+    run.add_argument('--websocket', action='store_true', help="serve over WebSocket instead of plain TCP")
+    run.add_argument('--alarm-log', help="append alarm raise/clear events to this text file")
+    return parser.parse_args(argv)
+
+
+def run_command(args):
+    if args.command == 'reparse':
+        stats = reparse_capture(args.capture, args.log)
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+        return
+    if args.command == 'simulate':
+        stats = run_simulator(
+            args.rate, args.seed, args.noise, args.corrupt, args.partial,
+            args.events, not args.unthrottled, args.duration
+        )
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+        return
+    if args.command == 'ports':
+        for port in serial.tools.list_ports.comports():
+            print(f"{port.device}\t{port.description}")
+        return
+    if args.command == 'run':
+        run_headless(
+            args.port, args.baud, args.duration, args.log, args.raw,
+            args.setpoints, args.profile, args.interval, args.json,
+            serve_port=args.serve, serve_format=args.serve_format, websocket=args.websocket,
+            alarm_log=args.alarm_log
+        )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command:
+        try:
+            run_command(args)
+        except (serial.SerialException, OSError, ValueError) as e:
+            # Bad port, unreadable file or malformed profile: one line, no traceback.
+            sys.exit(f"error: {e}")
+        return
+
+    load_gui()
     root = tbs.Window(themename="superhero")
     app = AdvancedSerialMonitor(root)
     root.mainloop()
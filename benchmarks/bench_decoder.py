@@ -0,0 +1,99 @@
+"""Micro-benchmark: vectorized decode_frames() vs the old per-frame parser.
+
+    python benchmarks/bench_decoder.py --frames 100000
+"""
+import argparse
+import time
+
+from common import load_app, make_stream
+
+
+def legacy_parse(buffer):
+    # Per-frame path get_data() used before decode_frames(): find/slice per
+    # frame, byte indexing and a nested dict per sample.
+    results = []
+    while True:
+        start = buffer.find(b'<:')
+        end = buffer.find(b':>', start)
+        if start != -1 and end != -1 and end > start:
+            line_end = end + 2
+            raw_data = buffer[start:line_end]
+            buffer = buffer[line_end:]
+
+            str_line = raw_data.decode('utf-8', errors="ignore").strip()
+            if not str_line:
+                continue
+
+            result = {"time": time.time()}
+            for channel in ["CH1", "CH2", "CH3"]:
+                result[channel] = {"V": 0, "I": 0, "R": 0, "P": 0}
+
+            for c, channel in enumerate(["CH1", "CH2", "CH3"]):
+                base = 10 * c
+                try:
+                    if len(raw_data) > base + 3:
+                        result[channel]["V"] = min(raw_data[base + 2] * 256 + raw_data[base + 3], 30000)
+                except (IndexError, TypeError) as e:
+                    print(f"Error reading {channel} V: {e}")
+                try:
+                    if len(raw_data) > base + 6:
+                        result[channel]["I"] = min(raw_data[base + 5] * 256 + raw_data[base + 6], 1000)
+                except (IndexError, TypeError) as e:
+                    print(f"Error reading {channel} I: {e}")
+                try:
+                    if len(raw_data) > base + 10:
+                        result[channel]["G"] = raw_data[base + 9] * 256 + raw_data[base + 10]
+                except (IndexError, TypeError) as e:
+                    print(f"Error reading {channel} G: {e}")
+
+                if result[channel]["I"] != 0:
+                    result[channel]["R"] = result[channel]["V"] / result[channel]["I"]
+                else:
+                    result[channel]["R"] = 10000
+                result[channel]["P"] = result[channel]["V"] * result[channel]["I"] / 1000
+            results.append(result)
+        else:
+            break
+    return results
+
+
+def run(label, func, data, n_frames, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<14} {best * 1e3:9.2f} ms  {n_frames / best:14,.0f} frames/s")
+    return n_frames / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=50000)
+    parser.add_argument('--chunk', type=int, default=0,
+                        help="decode in chunks of this many bytes (0 = one block)")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = load_app()
+    data = make_stream(args.frames)
+
+    values = app.decode_frames(bytearray(data))[0]
+    assert len(values) == args.frames == len(legacy_parse(bytearray(data)))
+
+    def vectorized(block):
+        if not args.chunk:
+            return app.decode_frames(bytearray(block))
+        buffer = app.ByteRingBuffer()
+        for offset in range(0, len(block), args.chunk):
+            buffer.write(block[offset:offset + args.chunk])
+            consumed = app.decode_frames(buffer.peek())[-1]
+            buffer.consume(consumed)
+
+    legacy = run("per-frame", lambda block: legacy_parse(bytearray(block)), data, args.frames, args.repeat)
+    fast = run("decode_frames", vectorized, data, args.frames, args.repeat)
+    print(f"speed-up: {fast / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
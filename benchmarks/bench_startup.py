@@ -0,0 +1,120 @@
+"""Cold-start benchmark: module import, first paint and plotting-ready time.
+
+    python benchmarks/bench_startup.py --runs 5
+
+Every run is a fresh interpreter, so the numbers include Python start-up and
+a cold-ish import cache, like launching the app. First paint is the time
+until the main window has been built and drawn once; plotting-ready is when
+the background matplotlib preload has finished. The GUI probe needs a
+display and is reported as skipped without one.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from common import APP_PATH
+
+
+LOAD_APP = """
+import importlib.util, json, time
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("serial_monitor", {path!r})
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+"""
+
+IMPORT_PROBE = LOAD_APP + """
+print(json.dumps({{"import_ms": (time.perf_counter() - t0) * 1000}}))
+"""
+
+GUI_PROBE = LOAD_APP + """
+t1 = time.perf_counter()
+app.load_gui()
+root = app.tbs.Window(themename="superhero")
+monitor = app.AdvancedSerialMonitor(root)
+root.update()
+t2 = time.perf_counter()
+while app.plt is None and time.perf_counter() - t2 < 30:
+    root.update()
+    time.sleep(0.005)
+t3 = time.perf_counter()
+monitor.close()
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "first_paint_ms": (t2 - t0) * 1000,
+    "plotting_ready_ms": (t3 - t0) * 1000
+}}))
+"""
+
+
+def probe(code):
+    # Returns (metrics, wall time including interpreter start-up) or None.
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:] or ["failed"]
+    metrics = json.loads(result.stdout.strip().splitlines()[-1])
+    metrics["process_ms"] = wall_ms
+    return metrics, None
+
+
+def heavy_imports():
+    # Which GUI modules a plain import of the app pulls in.
+    code = IMPORT_PROBE.format(path=APP_PATH) + (
+        "import sys\n"
+        "print(json.dumps(sorted(m for m in ('tkinter', 'ttkbootstrap', 'matplotlib', 'asyncio')"
+        " if m in sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]) if result.returncode == 0 else None
+
+
+def summarize(label, runs):
+    keys = runs[0].keys()
+    summary = {key: statistics.median(run[key] for run in runs) for key in keys}
+    print(label)
+    for key, value in summary.items():
+        print(f"  {key:<18} {value:9.1f} ms")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--no-gui', action='store_true', help="skip the first-paint probe")
+    parser.add_argument('--json', help="also write the medians to this file")
+    args = parser.parse_args()
+
+    results = {'runs': args.runs}
+    import_runs = []
+    for _ in range(args.runs):
+        metrics, error = probe(IMPORT_PROBE.format(path=APP_PATH))
+        if error:
+            sys.exit(f"import probe failed: {error[0]}")
+        import_runs.append(metrics)
+    results['import'] = summarize("module import (headless)", import_runs)
+    results['gui_modules_on_import'] = heavy_imports()
+    print(f"  GUI modules pulled in by import: {results['gui_modules_on_import'] or 'none'}")
+
+    if not args.no_gui:
+        gui_runs = []
+        for _ in range(args.runs):
+            metrics, error = probe(GUI_PROBE.format(path=APP_PATH))
+            if error:
+                print(f"GUI probe skipped: {error[0]}")
+                break
+            gui_runs.append(metrics)
+        if gui_runs:
+            results['gui'] = summarize("GUI start-up", gui_runs)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
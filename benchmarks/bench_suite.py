@@ -0,0 +1,396 @@
+"""End-to-end benchmark suite: parser, stores, logger, rendering and latency.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --quick --baseline results.json
+
+All data comes from the app's VirtualDevice, so runs are repeatable. Every
+result is written to one JSON file; with --baseline the run is compared
+against an earlier file and exits non-zero when a metric regresses by more
+than --tolerance. Keys ending in _per_s are higher-is-better, keys ending
+in _ms, _us or _ns lower-is-better; anything else is informational.
+
+Rendering uses matplotlib's Agg canvas with the layout start_plotting
+builds (one figure per channel, 1-4 metric subplots), so it runs without a
+display; the final Tk blit to the screen is not included. Ticks go through
+the app's own render_window, and the latency run drives the monitor's real
+acquisition thread, queue poll and ingest path.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from common import load_app
+
+
+def percentiles(samples, scale=1e3):
+    samples = np.asarray(samples) * scale
+    return {
+        'median': float(np.median(samples)),
+        'p95': float(np.percentile(samples, 95)),
+        'max': float(samples.max())
+    }
+
+
+def bench_parser(app, n_frames):
+    results = {}
+    for label, kwargs in (('clean', {}), ('corrupt_1pct', {'corrupt_rate': 0.01, 'partial_rate': 0.01})):
+        device = app.VirtualDevice(throttle=False, noise=0.01, **kwargs)
+        handler = app.SerialCommunicationHandler(ser=device)
+        decoded = 0
+        t0 = time.perf_counter()
+        while device.frames_generated < n_frames:
+            batch = handler.get_data()
+            if batch:
+                decoded += len(batch['time'])
+        elapsed = time.perf_counter() - t0
+        results[label] = {
+            'frames': decoded,
+            'frames_per_s': decoded / elapsed,
+            'bytes_per_s': device.frames_generated * app.FRAME_SIZE / elapsed
+        }
+
+    # decode_frames alone on one contiguous block, without the device.
+    data = app.VirtualDevice(throttle=False, noise=0.01).read(n_frames * app.FRAME_SIZE)
+    block = bytearray(data)
+    best = min(_timed(app.decode_frames, block) for _ in range(3))
+    results['decode_frames_per_s'] = n_frames / best
+    return results
+
+
+def _timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def make_batches(app, n_frames, batch_size, rate=1000.0):
+    device = app.VirtualDevice(rate=rate, throttle=False, noise=0.01)
+    handler = app.SerialCommunicationHandler()
+    data = device.read(n_frames * app.FRAME_SIZE)
+    values = []
+    for offset in range(0, len(data), 32768):
+        batch = handler.feed(data[offset:offset + 32768], 0)
+        if batch:
+            values.append(batch['values'])
+    values = np.concatenate(values)
+    times = np.arange(len(values)) / rate
+    return [(times[i:i + batch_size], values[i:i + batch_size]) for i in range(0, len(values), batch_size)]
+
+
+def bench_store(app, n_frames):
+    results = {}
+    for batch_size in (1, 10, 100, 1000):
+        batches = make_batches(app, min(n_frames, batch_size * 2000), batch_size)
+        samples = sum(len(t) for t, _ in batches)
+        for name, store in (('history', app.HistoryStore()), ('stats', app.RunningStats())):
+            t0 = time.perf_counter()
+            for times, values in batches:
+                store.append(times, values)
+            elapsed = time.perf_counter() - t0
+            results[f"{name}_batch{batch_size}"] = {
+                'append_us': elapsed / len(batches) * 1e6,
+                'per_sample_ns': elapsed / samples * 1e9
+            }
+    return results
+
+
+def bench_logger(app, n_frames):
+    results = {}
+    device = app.VirtualDevice(throttle=False, noise=0.01)
+    handler = app.SerialCommunicationHandler(ser=device)
+    batches = []
+    while device.frames_generated < n_frames:
+        batch = handler.get_data()
+        if batch:
+            batches.append(batch)
+    frames = sum(len(batch['time']) for batch in batches)
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, name in (('binary', 'log.bin'), ('csv', 'log.csv')):
+            logger = app.Logger()
+            success, msg = logger.start_logging(os.path.join(tmp, name), fmt=fmt)
+            if not success:
+                raise OSError(msg)
+            t0 = time.perf_counter()
+            for batch in batches:
+                logger.log_batch(batch['time'], batch)
+            queued = time.perf_counter() - t0
+            logger.close()  # joins the writer, so everything is on disk
+            elapsed = time.perf_counter() - t0
+            results[fmt] = {
+                'bytes': logger.bytes_written,
+                'bytes_per_s': logger.bytes_written / elapsed,
+                'frames_per_s': frames / elapsed,
+                'log_batch_us': queued / len(batches) * 1e6
+            }
+    return results
+
+
+class ChannelFigure:
+    """One plot window as start_plotting lays it out, on an Agg canvas."""
+
+    def __init__(self, app, n_metrics):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.figure = Figure(figsize=(12, 8), dpi=100)
+        self.canvas = FigureCanvasAgg(self.figure)
+        rows = int(np.ceil(np.sqrt(n_metrics)))
+        cols = int(np.ceil(n_metrics / rows))
+        self.axes, self.lines = {}, {}
+        for i, key in enumerate(app.METRIC_KEYS[:n_metrics]):
+            ax = self.figure.add_subplot(rows, cols, i + 1)
+            ax.set_title(key)
+            ax.set_xlabel('Time (s)')
+            ax.grid(True)
+            ax.set_ylim(0, 30000)
+            self.axes[key] = ax
+            self.lines[key], = ax.plot([], [])
+        self.figure.tight_layout(pad=3.0)
+        self.renderer = app.BlitRenderer(self.figure, self.canvas, self.lines.values())
+        self.full_draws = 0
+        self.canvas.mpl_connect('draw_event', self._count_draw)
+        self.canvas.draw()
+
+    def _count_draw(self, event):
+        self.full_draws += 1
+
+
+def render_tick(app, history, figures, window=20.0, headroom=0.2):
+    # One tick of AdvancedSerialMonitor.update_plot over every window.
+    latest = history.latest_time()
+    queries = {}
+    for c, fig in enumerate(figures):
+        app.render_window(history, fig.axes, fig.lines, fig.renderer, c, latest, window,
+                          headroom=headroom, queries=queries)
+
+
+class TkStub:
+    """Just enough of Tk's after() scheduler to drive the monitor's poll."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.jobs[self.next_id] = (time.perf_counter() + ms / 1000, func)
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_due(self):
+        now = time.perf_counter()
+        for job, (due, func) in list(self.jobs.items()):
+            if due <= now and self.jobs.pop(job, None):
+                func()
+
+
+def headless_monitor(app, handler):
+    """An AdvancedSerialMonitor without a window. Acquisition, the queue
+    poll and ingest (acquisition_loop, process_data_queue, ingest_data,
+    update_data_buffers) are the app's own; only widget updates are
+    stubbed out. Each poll's duration is recorded in poll_times."""
+
+    class HeadlessMonitor(app.AdvancedSerialMonitor):
+        def __init__(self):
+            self.root = TkStub()
+            self.serial_connection = handler
+            self.replay = None
+            self.logger = app.Logger()
+            self.history = app.HistoryStore()
+            self.stats = app.RunningStats()
+            self.QUEUE_SIZE = 1000
+            self.POLL_INTERVAL = 20
+            self.STATS_TABLE_INTERVAL = 0.5
+            self.last_stats_table_update = 0.0
+            self.running = False
+            self.data_thread = None
+            self.poll_job = None
+            self.start_time = time.perf_counter()
+            self.poll_times = []
+
+        def process_data_queue(self):
+            t0 = time.perf_counter()
+            super().process_data_queue()
+            self.poll_times.append(time.perf_counter() - t0)
+
+        def update_command_status(self):
+            pass
+
+        def update_stats_table(self):
+            pass
+
+        def show_alarm(self, event):
+            pass
+
+    return HeadlessMonitor()
+
+
+def bench_render(app, ticks, rate=1000.0, fps=30.0):
+    results = {}
+    per_tick = int(rate / fps)
+    batches = make_batches(app, int(rate * 60) + ticks * per_tick, per_tick, rate)
+    warmup = int(60 * fps)
+    for n_metrics in range(1, 5):
+        history = app.HistoryStore()
+        figures = [ChannelFigure(app, n_metrics) for _ in app.CHANNELS]
+        for times, values in batches[:warmup]:
+            history.append(times, values)
+        blit, full = [], []
+        for times, values in batches[warmup:warmup + ticks]:
+            history.append(times, values)
+            draws = sum(fig.full_draws for fig in figures)
+            t0 = time.perf_counter()
+            render_tick(app, history, figures)
+            elapsed = time.perf_counter() - t0
+            # Ticks where the window scrolled redraw everything.
+            (full if sum(fig.full_draws for fig in figures) > draws else blit).append(elapsed)
+        t0 = time.perf_counter()
+        for fig in figures:
+            fig.renderer.invalidate()
+        render_tick(app, history, figures)
+        full.append(time.perf_counter() - t0)
+        results[f"{n_metrics}x{len(app.CHANNELS)}"] = {
+            'subplots': n_metrics * len(app.CHANNELS),
+            'tick_ms': percentiles(blit or full),
+            'full_redraw_ms': percentiles(full)
+        }
+    return results
+
+
+def bench_latency(app, duration, n_metrics=4, rate=1000.0):
+    """Byte-in to rendered-line latency through the GUI's pipeline: reader
+    thread -> bounded queue -> 20 ms poll into the history -> render clock."""
+    handler = app.SerialCommunicationHandler(ser=app.VirtualDevice(rate=rate, noise=0.01, timeout=0.05))
+    monitor = headless_monitor(app, handler)
+    monitor.start_acquisition()
+    figures = [ChannelFigure(app, n_metrics) for _ in app.CHANNELS]
+    frame_rate = app.FrameRateController()
+    latencies = []
+    primed = False
+    next_render = time.perf_counter()
+    end = next_render + duration
+    while time.perf_counter() < end:
+        monitor.root.run_due()
+        now = time.perf_counter()
+        if now >= next_render and monitor.history.latest_time() is not None:
+            t0 = time.perf_counter()
+            render_tick(app, monitor.history, figures)
+            done = time.perf_counter()
+            frame_rate.record(t0, done - t0)
+            if primed:
+                latencies.append(done - (monitor.history.latest_time() + monitor.start_time))
+            else:
+                # The first tick lays out the axes with a full draw.
+                primed = True
+                end = max(end, done + duration)
+                monitor.poll_times.clear()
+            next_render = done + frame_rate.next_delay_ms() / 1000
+        time.sleep(0.001)
+    monitor.stop_acquisition()
+    handler.close()
+    return {
+        'subplots': n_metrics * len(app.CHANNELS),
+        'renders': len(latencies),
+        'latency_ms': percentiles(latencies),
+        'poll_ms': percentiles(monitor.poll_times),
+        'render_fps': frame_rate.stats()['fps'],
+        'dropped_batches': monitor.dropped_batches
+    }
+
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    # Returns the list of regressions beyond tolerance.
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, old in previous.items():
+        new = current.get(name)
+        if new is None or not old:
+            continue
+        leaf = name.rsplit('.', 1)[-1]
+        parent = name.rsplit('.', 2)[-2] if name.count('.') >= 1 else ''
+        unit = leaf if leaf.endswith(('_per_s', '_ms', '_us', '_ns')) else parent
+        if unit.endswith('_per_s') and new < old * (1 - tolerance):
+            regressions.append((name, old, new))
+        elif unit.endswith(('_ms', '_us', '_ns')) and new > old * (1 + tolerance):
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=200000, help="frames for parser/logger runs")
+    parser.add_argument('--ticks', type=int, default=200, help="render ticks per layout")
+    parser.add_argument('--latency-seconds', type=float, default=5.0)
+    parser.add_argument('--quick', action='store_true', help="small sizes for CI smoke runs")
+    parser.add_argument('--skip', action='append', default=[],
+                        choices=['parser', 'store', 'logger', 'render', 'latency'])
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+    if args.quick:
+        args.frames, args.ticks, args.latency_seconds = 20000, 30, 1.0
+
+    app = load_app()
+    import matplotlib
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'frames': args.frames
+        }
+    }
+    suites = [
+        ('parser', lambda: bench_parser(app, args.frames)),
+        ('store', lambda: bench_store(app, args.frames)),
+        ('logger', lambda: bench_logger(app, args.frames)),
+        ('render', lambda: bench_render(app, args.ticks)),
+        ('latency', lambda: bench_latency(app, args.latency_seconds)),
+    ]
+    for name, run in suites:
+        if name in args.skip:
+            continue
+        t0 = time.perf_counter()
+        results[name] = run()
+        print(f"{name:<8} done in {time.perf_counter() - t0:5.1f} s", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.4g} -> {new:.4g}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
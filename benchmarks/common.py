@@ -0,0 +1,35 @@
+import importlib.util
+import os
+import struct
+
+import numpy as np
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "Advanced Serial Monitor Pro.py")
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location("serial_monitor", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_frame(v, i, g, flags=0):
+    frame = bytearray(b'<:')
+    for c in range(3):
+        frame += struct.pack('>H', v[c]) + b':' + struct.pack('>H', i[c]) + b'::'
+        frame += struct.pack('>H', g[c]) + b':'
+    frame += b'::' + bytes([flags]) + b':>'
+    return bytes(frame)
+
+
+def make_stream(n_frames, seed=0):
+    # Values stay below 0x3a00 so no payload byte pair looks like a frame
+    # delimiter to the old find()-based parser.
+    rng = np.random.default_rng(seed)
+    v = rng.integers(0, 14000, size=(n_frames, 3))
+    i = rng.integers(0, 1000, size=(n_frames, 3))
+    g = rng.integers(0, 14000, size=(n_frames, 3))
+    return b''.join(make_frame(v[k], i[k], g[k]) for k in range(n_frames))
@@ -0,0 +1,16 @@
+import importlib.util
+import os
+
+import pytest
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "Advanced Serial Monitor Pro.py")
+
+
+@pytest.fixture(scope="session")
+def app():
+    spec = importlib.util.spec_from_file_location("serial_monitor", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
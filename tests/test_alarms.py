@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+
+def publish(bus, flags, t0, step=0.001):
+    flags = np.asarray(flags, dtype=np.uint8)
+    bus.publish_flags(t0 + step * np.arange(len(flags)), flags)
+
+
+def summary(events):
+    return [(e['key'], e['active'], e['count']) for e in events]
+
+
+def test_only_transitions_emit(app):
+    bus = app.AlarmBus(dedup_interval=0.0)
+    publish(bus, [0x40] * 5 + [0] * 5, time.perf_counter())
+    assert summary(bus.drain()) == [('CH1_OVER_CURRENT', True, 1), ('CH1_OVER_CURRENT', False, 1)]
+    assert bus.active == 0
+
+
+def test_flap_within_dedup_window_bumps_count(app):
+    bus = app.AlarmBus(dedup_interval=0.05)
+    publish(bus, [0x40, 0, 0x40], time.perf_counter())
+    assert summary(bus.drain()) == [('CH1_OVER_CURRENT', True, 2)]
+    assert bus.active == 0x40
+
+
+def test_held_back_change_is_emitted_after_window(app, tmp_path):
+    log = tmp_path / "alarms.log"
+    bus = app.AlarmBus(dedup_interval=0.05, log_path=str(log))
+    t0 = time.perf_counter()
+    publish(bus, [0x80, 0], t0)
+    assert summary(bus.drain()) == [('OVER_TEMP', True, 1)]
+    time.sleep(0.06)
+    assert summary(bus.drain()) == [('OVER_TEMP', False, 1)]
+    lines = log.read_text(encoding='utf-8').splitlines()
+    assert [line.split()[1:3] for line in lines] == [['RAISED', 'OVER_TEMP:'], ['CLEARED', 'OVER_TEMP:']]
+
+
+def test_clear_of_never_emitted_key_is_dropped(app):
+    bus = app.AlarmBus(dedup_interval=0.0, max_rate=1e-3, burst=1)
+    publish(bus, [0x80, 0xC0, 0x80], time.perf_counter())
+    assert summary(bus.drain()) == [('OVER_TEMP', True, 1)]
+    assert bus.suppressed == 1
+    assert all(state['pending'] is None for state in bus._keys.values())
+
+
+def test_rate_limited_changes_end_in_active_state(app):
+    bus = app.AlarmBus(dedup_interval=0.0, max_rate=200.0, burst=2)
+    publish(bus, [0xF0, 0x80], time.perf_counter(), step=0.0)
+    events = bus.drain()
+    assert len(events) == 2
+    assert bus.suppressed >= 2
+    for _ in range(20):
+        time.sleep(0.01)
+        events += bus.drain()
+    final = {e['key']: e['active'] for e in events}
+    assert final == {key: bool(bus.active & mask) for mask, key, _ in app.FLAG_ALARMS if key in final}
+    # CH2/CH3 were raised and cleared while held back, so never emitted.
+    assert final == {'OVER_TEMP': True, 'CH1_OVER_CURRENT': False}
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def frames(app, n, v=12000, i=100, g=1000, flags=0):
+    shape = (n, len(app.CHANNELS))
+    return app.encode_frames(np.full(shape, v), np.full(shape, i), np.full(shape, g),
+                             np.full(n, flags, dtype=np.uint8))
+
+
+def test_encode_decode_round_trip(app):
+    rng = np.random.default_rng(0)
+    v = rng.integers(0, app.V_MAX, size=(50, 3))
+    i = rng.integers(1, app.I_MAX, size=(50, 3))
+    g = rng.integers(0, 65536, size=(50, 3))
+    flags = rng.integers(0, 256, size=50).astype(np.uint8)
+    values, gains, out_flags, starts, consumed = app.decode_frames(app.encode_frames(v, i, g, flags).tobytes())
+    assert np.array_equal(values[:, :, 0], v)
+    assert np.array_equal(values[:, :, 1], i)
+    assert np.array_equal(gains, g)
+    assert np.array_equal(out_flags, flags)
+    assert np.array_equal(starts, np.arange(50) * app.FRAME_SIZE)
+    assert consumed == 50 * app.FRAME_SIZE
+
+
+def test_partial_trailing_frame_is_kept(app):
+    data = frames(app, 3).tobytes()
+    starts, consumed = app.find_frames(np.frombuffer(data[:-10], dtype=np.uint8))
+    assert starts.tolist() == [0, app.FRAME_SIZE]
+    assert consumed == 2 * app.FRAME_SIZE
+
+    # A lone '<' may be the first byte of the next frame.
+    starts, consumed = app.find_frames(np.frombuffer(data[:app.FRAME_SIZE + 1], dtype=np.uint8))
+    assert starts.tolist() == [0]
+    assert consumed == app.FRAME_SIZE
+
+
+def test_overlapping_candidate_falls_back_to_greedy_scan(app):
+    # I1 = 0x003c puts '<' before the ':' separator, so a second '<:' starts
+    # 6 bytes into the first frame; I1 = 0x3e00 in the next frame supplies
+    # the matching ':>' 37 bytes later.
+    first = frames(app, 1, i=0x003c)
+    second = frames(app, 1, i=0x3e00)
+    data = np.concatenate([first, second]).ravel()
+    assert bytes(data[6:8]) == app.FRAME_START
+    assert bytes(data[6 + app.FRAME_SIZE - 2:6 + app.FRAME_SIZE]) == app.FRAME_END
+
+    starts, consumed = app.find_frames(data)
+    assert starts.tolist() == [0, app.FRAME_SIZE]
+    assert consumed == 2 * app.FRAME_SIZE
+    values = app.decode_frames(data.tobytes())[0]
+    assert values[:, 0, 1].tolist() == [0x003c, min(0x3e00, app.I_MAX)]
+
+
+def test_truncated_frames_from_virtual_device(app):
+    device = app.VirtualDevice(seed=1, partial_rate=0.1, throttle=False)
+    data = device.read(1000 * app.FRAME_SIZE)
+    values, gains, flags, starts, consumed = app.decode_frames(data)
+    assert 0.8 * 1000 < len(values) < 1000
+    assert np.all(values[:, :, 0] == 12000)
+    assert np.all(values[:, :, 1] == 100)
+    assert np.all(gains == 1000)
+    assert np.all(np.diff(starts) >= app.FRAME_SIZE)
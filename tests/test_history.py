@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def history(app):
+    # 1002 samples with value == time. Level 0 keeps the newest 64, tier 1
+    # buckets 4 samples and tier 2 buckets 16; samples 1000-1001 and tier 1
+    # buckets 992 and 996 are still pending.
+    store = app.HistoryStore(recent_capacity=64, tier_capacity=64, factor=4, n_tiers=2,
+                             sample_shape=(1,))
+    times = np.arange(1002.0)
+    store.append(times[:500], times[:500, None])
+    store.append(times[500:], times[500:, None])
+    return store
+
+
+def test_recent_range_uses_full_rate(history):
+    level, times, lo, hi = history.query(990, 1001, 100)
+    assert level == 0
+    assert times[0] == 989 and times[-1] == 1001
+    assert np.array_equal(lo, hi)
+
+
+def test_older_range_uses_tier_that_covers_it(history):
+    level, times, lo, hi = history.query(800, 1001, 1000)
+    assert level == 1
+    assert times[0] <= 800
+    assert times[-2:].tolist() == [1000, 1001]
+    assert lo[-3, 0] == 996 and hi[-3, 0] == 999
+
+
+def test_point_budget_moves_to_coarser_tier(history):
+    level, _, _, _ = history.query(900, 1001, 30)
+    assert level == 2
+
+
+def test_coarsest_tier_joins_pending_entries(history):
+    level, times, lo, hi = history.query(0, 1001, 1000)
+    assert level == 2
+    assert lo[0, 0] == 0 and hi[0, 0] == 15
+    assert times[-5:].tolist() == [976, 992, 996, 1000, 1001]
+    assert hi[-5:, 0].tolist() == [991, 995, 999, 1000, 1001]
+    assert np.all(np.diff(times) > 0)
+
+
+def test_empty_store(app):
+    level, times, lo, hi = app.HistoryStore(sample_shape=(1,)).query(0, 1, 100)
+    assert level == 0
+    assert len(times) == 0 and lo.shape == (0, 1)
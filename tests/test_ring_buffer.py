@@ -0,0 +1,37 @@
+def test_write_peek_consume(app):
+    buf = app.ByteRingBuffer(16)
+    buf.write(b'abcdef')
+    assert bytes(buf.peek()) == b'abcdef'
+    buf.consume(4)
+    assert bytes(buf.peek()) == b'ef'
+    assert buf.free() == 14
+    buf.consume(10)
+    assert len(buf) == 0
+    assert buf.read_pos == buf.write_pos == 0
+
+
+def test_write_wraps_unread_tail_to_start(app):
+    buf = app.ByteRingBuffer(16)
+    buf.write(b'0123456789ab')
+    buf.consume(10)
+    buf.write(b'cdefgh')
+    assert bytes(buf.peek()) == b'abcdefgh'
+    assert buf.read_pos == 0
+    assert buf.dropped_bytes == 0
+
+
+def test_overflow_drops_oldest_bytes(app):
+    buf = app.ByteRingBuffer(16)
+    buf.write(b'0123456789')
+    buf.consume(2)
+    buf.write(b'abcdefghij')
+    assert bytes(buf.peek()) == b'456789abcdefghij'
+    assert buf.dropped_bytes == 2
+
+
+def test_write_larger_than_capacity_keeps_newest(app):
+    buf = app.ByteRingBuffer(16)
+    buf.write(b'xyz')
+    buf.write(bytes(range(20)))
+    assert bytes(buf.peek()) == bytes(range(4, 20))
+    assert buf.dropped_bytes == 3 + 4